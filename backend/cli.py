@@ -0,0 +1,387 @@
+"""
+Bulk offline extraction.
+
+Streams HTML out of directories, tarballs and WARC files, runs meta
+extraction and section parsing across all cores and writes one
+ScrapeResult-shaped JSON object per line.
+
+    python -m backend.cli extract ./pages archive.tar.gz crawl.warc.gz --out ./out --shard-size 100000
+
+Output shards are named part-00000.jsonl, part-00001.jsonl, ... Records are
+written in input order, and _checkpoint.json in the output directory records
+how many documents of each source the flushed shards cover. Running the same
+command again truncates the last shard back to the checkpoint and skips each
+source up to its position, so the sources must not change between runs.
+"""
+
+import argparse
+import gzip
+import io
+import itertools
+import json
+import os
+import posixpath
+import re
+import sys
+import tarfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+HTML_EXTENSIONS = (".html", ".htm", ".xhtml")
+CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# (key, url, raw bytes, charset)
+Document = Tuple[str, str, bytes, Optional[str]]
+
+
+def extract_record(key: str, url: str, data: bytes, charset: Optional[str], scraped_at: str) -> str:
+    """Worker entry point: raw HTML bytes in, one JSONL line out"""
+    from backend.models import Error, Interactions, Meta, ScrapeResult
+    from backend.scraper.parse_pool import parse_document
+
+    try:
+        html = data.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        html = data.decode("utf-8", errors="replace")
+
+    errors = []
+    try:
+        document = parse_document(html, url)
+        meta = Meta(**document["meta"])
+        sections = document["sections"]
+    except Exception as e:
+        meta = Meta()
+        sections = []
+        errors.append(Error(message=f"Extraction failed: {str(e)}", phase="parse"))
+
+    result = ScrapeResult(
+        url=url,
+        scrapedAt=scraped_at,
+        meta=meta,
+        sections=sections,
+        interactions=Interactions(pages=[url]),
+        errors=errors
+    )
+    return result.model_dump_json()
+
+
+def iter_directory(path: str, base_url: Optional[str], skip: int = 0) -> Iterator[Document]:
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(HTML_EXTENSIONS):
+                continue
+            if skip:
+                # Already covered by the checkpoint; skipped without reading the file
+                skip -= 1
+                continue
+            full_path = os.path.join(dirpath, filename)
+            rel_path = os.path.relpath(full_path, path).replace(os.sep, "/")
+            url = f"{base_url.rstrip('/')}/{rel_path}" if base_url else f"file://{os.path.abspath(full_path)}"
+            with open(full_path, "rb") as f:
+                yield full_path, url, f.read(), None
+
+
+def iter_tarball(path: str, base_url: Optional[str]) -> Iterator[Document]:
+    # Streaming mode ("r|*") reads members in order without loading the index
+    with tarfile.open(path, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile() or not member.name.lower().endswith(HTML_EXTENSIONS):
+                continue
+            f = tar.extractfile(member)
+            if f is None:
+                continue
+            name = posixpath.normpath(member.name).lstrip("/")
+            url = f"{base_url.rstrip('/')}/{name}" if base_url else f"tar://{os.path.basename(path)}/{name}"
+            yield f"{path}:{member.name}", url, f.read(), None
+
+
+def _read_headers(stream: BinaryIO) -> Optional[Dict[str, str]]:
+    headers: Dict[str, str] = {}
+    line = stream.readline()
+    while line in (b"\r\n", b"\n"):
+        line = stream.readline()
+    if not line:
+        return None
+    while line and line not in (b"\r\n", b"\n"):
+        name, _, value = line.decode("utf-8", errors="replace").partition(":")
+        headers[name.strip().lower()] = value.strip()
+        line = stream.readline()
+    return headers
+
+
+def _dechunk(body: bytes) -> bytes:
+    out = io.BytesIO()
+    stream = io.BytesIO(body)
+    while True:
+        size_line = stream.readline()
+        if not size_line:
+            break
+        try:
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+        except ValueError:
+            return body
+        if size == 0:
+            break
+        out.write(stream.read(size))
+        stream.readline()
+    return out.getvalue()
+
+
+def _parse_http_response(block: bytes) -> Optional[Tuple[bytes, Optional[str]]]:
+    head, sep, body = block.partition(b"\r\n\r\n")
+    if not sep:
+        head, sep, body = block.partition(b"\n\n")
+    lines = head.decode("iso-8859-1").splitlines()
+    if not lines or not lines[0].startswith("HTTP/"):
+        return None
+    parts = lines[0].split()
+    if len(parts) < 2 or parts[1] != "200":
+        return None
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    content_type = headers.get("content-type", "")
+    if "html" not in content_type.lower():
+        return None
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _dechunk(body)
+    if headers.get("content-encoding", "").lower() == "gzip":
+        try:
+            body = gzip.decompress(body)
+        except OSError:
+            return None
+    match = CHARSET_RE.search(content_type)
+    return body, match.group(1) if match else None
+
+
+def iter_warc(path: str) -> Iterator[Document]:
+    opener = gzip.open if path.lower().endswith(".gz") else open
+    with opener(path, "rb") as stream:
+        while True:
+            headers = _read_headers(stream)
+            if headers is None:
+                break
+            length = int(headers.get("content-length", "0") or 0)
+            block = stream.read(length)
+            if headers.get("warc-type") != "response":
+                continue
+            if "application/http" not in headers.get("content-type", ""):
+                continue
+            parsed = _parse_http_response(block)
+            if not parsed:
+                continue
+            body, charset = parsed
+            url = headers.get("warc-target-uri", "").strip("<>")
+            record_id = headers.get("warc-record-id", url)
+            yield f"{path}:{record_id}", url, body, charset
+
+
+def iter_sources(sources, base_url: Optional[str], positions: Dict[str, int]) -> Iterator[Tuple[str, Document]]:
+    """Yield (source, document), skipping the first positions[source] documents of each source"""
+    for source in sources:
+        lower = source.lower()
+        skip = positions.get(source, 0)
+        if os.path.isdir(source):
+            documents = iter_directory(source, base_url, skip)
+        elif lower.endswith((".warc", ".warc.gz")):
+            documents = itertools.islice(iter_warc(source), skip, None)
+        elif tarfile.is_tarfile(source):
+            documents = itertools.islice(iter_tarball(source, base_url), skip, None)
+        else:
+            print(f"Skipping unsupported source: {source}", file=sys.stderr)
+            continue
+        for document in documents:
+            yield source, document
+
+
+class ShardWriter:
+    """
+    Appends JSONL records to rotating shards and checkpoints progress.
+
+    Records must arrive in input order. `checkpoint()` fsyncs the shard before
+    atomically replacing _checkpoint.json, so the checkpoint never points past
+    complete lines. On resume the shard is truncated back to the checkpointed
+    offset (dropping half-written lines and anything after the checkpoint) and
+    later shards are removed.
+    """
+
+    CHECKPOINT = "_checkpoint.json"
+
+    def __init__(self, out_dir: str, shard_size: int):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        os.makedirs(out_dir, exist_ok=True)
+        checkpoint = self._load_checkpoint()
+        if checkpoint:
+            self.index = checkpoint["shard"]
+            self.count = checkpoint["count"]
+            # Source -> documents covered (written, skipped or failed)
+            self.positions: Dict[str, int] = checkpoint["positions"]
+            later = self.index + 1
+            while os.path.exists(self._path(later)):
+                os.remove(self._path(later))
+                later += 1
+            with open(self._path(self.index), "ab") as f:
+                f.truncate(checkpoint["offset"])
+            self.file = open(self._path(self.index), "ab")
+        else:
+            self.index = 0
+            while os.path.exists(self._path(self.index)):
+                self.index += 1
+            self.count = 0
+            self.positions = {}
+            self.file = open(self._path(self.index), "wb")
+
+    def _path(self, index: int) -> str:
+        return os.path.join(self.out_dir, f"part-{index:05d}.jsonl")
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        path = os.path.join(self.out_dir, self.CHECKPOINT)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def write(self, source: str, line: str):
+        if self.shard_size and self.count >= self.shard_size:
+            self.file.close()
+            self.index += 1
+            self.count = 0
+            self.file = open(self._path(self.index), "wb")
+        self.file.write(line.encode("utf-8") + b"\n")
+        self.count += 1
+        self.advance(source)
+
+    def advance(self, source: str):
+        """Count a document of `source` as handled without writing a record"""
+        self.positions[source] = self.positions.get(source, 0) + 1
+
+    def checkpoint(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        state = {
+            "shard": self.index,
+            "count": self.count,
+            "offset": self.file.tell(),
+            "positions": self.positions,
+        }
+        path = os.path.join(self.out_dir, self.CHECKPOINT)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{path}.tmp", path)
+
+    def close(self):
+        self.checkpoint()
+        self.file.close()
+
+
+def run_extract(args) -> int:
+    writer = ShardWriter(args.out, args.shard_size)
+    workers = args.workers or os.cpu_count() or 1
+    max_in_flight = args.max_in_flight or workers * 4
+    scraped_at = datetime.utcnow().isoformat() + "Z"
+
+    resumed = sum(writer.positions.values())
+    if resumed:
+        print(f"Resuming after {resumed} documents from {ShardWriter.CHECKPOINT}", file=sys.stderr)
+
+    processed = skipped = failed = 0
+    bytes_in = 0
+    started = last_report = time.monotonic()
+
+    def report(final: bool = False):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        print(
+            f"{'done' if final else 'progress'}: {processed} written, {skipped} skipped, {failed} failed, "
+            f"{processed / elapsed:.1f} docs/s, {bytes_in / elapsed / 1e6:.2f} MB/s",
+            file=sys.stderr
+        )
+
+    # Results are written in submission order so the checkpoint is a plain
+    # per-source count; finished results wait in `ready` until their turn
+    pending = {}
+    ready: Dict[int, Tuple[str, Optional[str]]] = {}
+    submitted = written = 0
+
+    def drain():
+        nonlocal written, processed
+        while written in ready:
+            source, line = ready.pop(written)
+            if line is None:
+                writer.advance(source)
+            else:
+                writer.write(source, line)
+                processed += 1
+            written += 1
+
+    def collect(finished):
+        nonlocal failed
+        for future in finished:
+            position, source, key = pending.pop(future)
+            try:
+                ready[position] = (source, future.result())
+            except Exception as e:
+                failed += 1
+                ready[position] = (source, None)
+                print(f"Failed {key}: {e}", file=sys.stderr)
+        drain()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for source, (key, url, data, charset) in iter_sources(args.sources, args.base_url, writer.positions):
+                position = submitted
+                submitted += 1
+                if args.max_bytes and len(data) > args.max_bytes:
+                    skipped += 1
+                    ready[position] = (source, None)
+                    drain()
+                    continue
+                bytes_in += len(data)
+                # Bounded window: never hold more than max_in_flight documents, queued or finished, in memory
+                while submitted - written > max_in_flight:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                pending[executor.submit(extract_record, key, url, data, charset, scraped_at)] = (position, source, key)
+
+                if time.monotonic() - last_report >= args.progress_every:
+                    writer.checkpoint()
+                    report()
+                    last_report = time.monotonic()
+
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+    finally:
+        writer.close()
+        report(final=True)
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.cli", description="Offline bulk HTML extraction")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract = subparsers.add_parser("extract", help="Extract sections from directories, tarballs or WARC files")
+    extract.add_argument("sources", nargs="+", help="Directories, .tar/.tar.gz files or .warc/.warc.gz files")
+    extract.add_argument("--out", required=True, help="Output directory for JSONL shards")
+    extract.add_argument("--shard-size", type=int, default=0, help="Records per shard (0 = single shard)")
+    extract.add_argument("--base-url", default=None, help="URL prefix for files from directories and tarballs")
+    extract.add_argument("--workers", type=int, default=0, help="Worker processes (default: CPU count)")
+    extract.add_argument("--max-in-flight", type=int, default=0, help="Documents queued at once (default: 4 per worker)")
+    extract.add_argument("--max-bytes", type=int, default=0, help="Skip documents larger than this (0 = no limit)")
+    extract.add_argument("--progress-every", type=float, default=5.0, help="Seconds between progress reports")
+
+    args = parser.parse_args(argv)
+    if args.command == "extract":
+        return run_extract(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
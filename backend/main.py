@@ -2,9 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+import asyncio
 import os
+import sys
 
-from backend.routes import health, scrape
+from backend.routes import health, scrape, archive
+from backend.scraper.warmup import warm_up
 
 app = FastAPI(
     title="Lyftr AI - Universal Website Scraper",
@@ -20,8 +23,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_warm_up():
+    # Runs in the background so the server accepts /healthz and /readyz immediately
+    asyncio.get_event_loop().run_in_executor(scrape.executor, warm_up)
+
+
+@app.on_event("shutdown")
+def shutdown_parse_pool():
+    parse_pool_module = sys.modules.get("backend.scraper.parse_pool")
+    if parse_pool_module:
+        parse_pool_module.parse_pool.shutdown()
+
+
 app.include_router(health.router, tags=["health"])
 app.include_router(scrape.router, tags=["scrape"])
+app.include_router(archive.router, tags=["archive"])
 
 frontend_dist = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
 if os.path.exists(frontend_dist):
@@ -1,10 +1,22 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 
 
 class ScrapeRequest(BaseModel):
     url: str = Field(..., description="URL to scrape (must be http or https)")
+    previousSnapshotId: Optional[str] = Field(
+        None, description="Return only sections added, removed or changed since this snapshot"
+    )
+    dedupeBoilerplate: bool = Field(
+        False, description="Replace sections already known as the site's boilerplate with references"
+    )
+    priority: Literal["high", "normal", "low"] = Field(
+        "normal", description="Queue priority within the static and render lanes"
+    )
+    timeoutSeconds: Optional[float] = Field(
+        None, gt=0, le=300, description="Overall deadline for the scrape; a partial result is returned when it expires"
+    )
 
 
 class Meta(BaseModel):
@@ -41,6 +53,7 @@ class Section(BaseModel):
     content: Content
     rawHtml: str
     truncated: bool
+    boilerplateRef: Optional[str] = None
 
 
 class Error(BaseModel):
@@ -54,6 +67,12 @@ class Interactions(BaseModel):
     pages: List[str] = []
 
 
+class SectionDiff(BaseModel):
+    added: List[str] = []
+    removed: List[str] = []
+    changed: List[str] = []
+
+
 class ScrapeResult(BaseModel):
     url: str
     scrapedAt: str
@@ -61,6 +80,13 @@ class ScrapeResult(BaseModel):
     sections: List[Section]
     interactions: Interactions
     errors: List[Error] = []
+    snapshotId: Optional[str] = None
+    unchanged: bool = False
+    diff: Optional[SectionDiff] = None
+    archiveIds: List[str] = []
+    truncated: bool = False
+    # Full copy of every section referenced by boilerplateRef, keyed by fingerprint
+    boilerplate: Dict[str, Section] = {}
 
 
 class ScrapeResponse(BaseModel):
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException
+from backend.models import ScrapeResponse
+from backend.scraper.html_archive import html_archive
+from backend.routes.scrape import executor
+from typing import Optional
+import asyncio
+
+router = APIRouter()
+
+
+@router.get("/archive")
+async def list_archived(url: Optional[str] = None, limit: int = 50):
+    if not html_archive:
+        raise HTTPException(status_code=404, detail="HTML archive is disabled")
+    loop = asyncio.get_event_loop()
+    documents = await loop.run_in_executor(executor, html_archive.list, url, min(limit, 500))
+    return {"documents": documents}
+
+
+@router.post("/archive/{archive_id}/extract", response_model=ScrapeResponse)
+async def extract_archived(archive_id: str):
+    from backend.scraper.scraper_service import ScraperService
+    
+    loop = asyncio.get_event_loop()
+    service = ScraperService()
+    try:
+        result = await loop.run_in_executor(executor, service.extract_from_archive, archive_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Extraction failed: {str(e)}"
+        )
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Archived document not found: {archive_id}")
+    return ScrapeResponse(result=result)
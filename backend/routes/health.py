@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from backend.scraper.warmup import readiness
+from backend.scraper.admission import admission
 
 router = APIRouter()
 
@@ -7,3 +10,13 @@ router = APIRouter()
 async def health_check():
     return {"status": "ok"}
 
+
+@router.get("/readyz")
+async def readiness_check():
+    state = readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+
+@router.get("/admission")
+async def admission_stats():
+    return admission.stats()
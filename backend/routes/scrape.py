@@ -1,23 +1,63 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from backend.models import ScrapeRequest, ScrapeResponse
-from backend.scraper.scraper_service import ScraperService
+from backend.scraper.deadline import Deadline
+from backend.scraper.admission import LaneSaturated, admission
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
 
 router = APIRouter()
-executor = ThreadPoolExecutor(max_workers=2)
+# Sized so every admitted or queued request has a thread; the lanes do the limiting
+executor = ThreadPoolExecutor(max_workers=admission.max_threads())
+
+DEFAULT_TIMEOUT_SECONDS = 60.0
+DISCONNECT_POLL_SECONDS = 0.5
 
 
 @router.post("/scrape", response_model=ScrapeResponse)
-async def scrape_url(request: ScrapeRequest):
+async def scrape_url(request: ScrapeRequest, http_request: Request):
+    # Fast path: reject before queueing anything when the static lane is full
+    if admission.static.saturated():
+        raise _too_many_requests(LaneSaturated("static", admission.static.retry_after()))
+    
     try:
+        from backend.scraper.scraper_service import ScraperService
+        
         loop = asyncio.get_event_loop()
         service = ScraperService()
-        result = await loop.run_in_executor(executor, service.scrape, request.url)
+        deadline = Deadline(request.timeoutSeconds or DEFAULT_TIMEOUT_SECONDS)
+        future = loop.run_in_executor(
+            executor,
+            service.scrape,
+            request.url,
+            request.previousSnapshotId,
+            deadline,
+            request.priority,
+            request.dedupeBoilerplate
+        )
+        
+        # Cancel the scrape's deadline if the client goes away, so the worker
+        # stops interacting with the page and frees its browser context
+        while True:
+            done, _ = await asyncio.wait({future}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                break
+            if not deadline.cancelled and await http_request.is_disconnected():
+                deadline.cancel()
+        
+        result = future.result()
         return ScrapeResponse(result=result)
+    except LaneSaturated as e:
+        raise _too_many_requests(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Scraping failed: {str(e)}"
         )
 
+
+def _too_many_requests(error: LaneSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
@@ -0,0 +1,176 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class LaneSaturated(Exception):
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"The {lane} lane is saturated; retry in {retry_after}s")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class LaneTimeout(Exception):
+    """The caller's timeout (normally its deadline) ran out while it was queued"""
+
+    def __init__(self, lane: str):
+        super().__init__(f"Timed out while queued for the {lane} lane")
+        self.lane = lane
+
+
+class Lane:
+    """
+    A capacity pool with a bounded priority queue. Up to `capacity` holders
+    run at once; up to `max_queue` more wait, served by priority and then
+    arrival order. Anything beyond that is rejected immediately with
+    LaneSaturated; a queued caller whose timeout runs out gets LaneTimeout.
+    """
+
+    def __init__(self, name: str, capacity: int, max_queue: int):
+        self.name = name
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._avg_wait = 0.0
+        self._max_wait = 0.0
+        self._avg_service = 1.0
+
+    def saturated(self) -> bool:
+        with self._cond:
+            return self._active >= self.capacity and len(self._waiting) >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Rough time until a queue slot frees up, in whole seconds"""
+        with self._cond:
+            return self._retry_after_locked()
+
+    def _retry_after_locked(self) -> int:
+        backlog = (len(self._waiting) + 1) / max(self.capacity, 1)
+        return max(1, math.ceil(self._avg_service * backlog))
+
+    def acquire(self, priority: str = "normal", timeout: Optional[float] = None):
+        rank = PRIORITIES.get(priority, PRIORITIES["normal"])
+        started = time.monotonic()
+        with self._cond:
+            if self._active < self.capacity and not self._waiting:
+                self._admit(started)
+                return
+            if len(self._waiting) >= self.max_queue:
+                self._rejected += 1
+                raise LaneSaturated(self.name, self._retry_after_locked())
+
+            ticket = (rank, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while not (self._active < self.capacity and self._waiting[0] == ticket):
+                    remaining = None if timeout is None else timeout - (time.monotonic() - started)
+                    if remaining is not None and remaining <= 0:
+                        self._timed_out += 1
+                        raise LaneTimeout(self.name)
+                    self._cond.wait(remaining)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self._admit(started)
+            # The next waiter may fit too when capacity > 1
+            self._cond.notify_all()
+
+    def _admit(self, started: float):
+        waited = time.monotonic() - started
+        self._active += 1
+        self._admitted += 1
+        self._avg_wait = 0.9 * self._avg_wait + 0.1 * waited
+        self._max_wait = max(self._max_wait * 0.99, waited)
+
+    def release(self, service_time: Optional[float] = None):
+        with self._cond:
+            self._active = max(0, self._active - 1)
+            if service_time is not None:
+                self._avg_service = 0.9 * self._avg_service + 0.1 * service_time
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: str = "normal", timeout: Optional[float] = None):
+        self.acquire(priority, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "active": self._active,
+                "queued": len(self._waiting),
+                "maxQueue": self.max_queue,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timedOut": self._timed_out,
+                "avgWaitMs": round(self._avg_wait * 1000, 1),
+                "maxWaitMs": round(self._max_wait * 1000, 1),
+                "avgServiceMs": round(self._avg_service * 1000, 1),
+            }
+
+
+class RenderLane(Lane):
+    """
+    Lane whose work runs on its own threads, one per slot, so the number of
+    pooled browsers (one per thread) never exceeds the lane's capacity.
+    """
+
+    def __init__(self, name: str, capacity: int, max_queue: int):
+        super().__init__(name, capacity, max_queue)
+        self.executor = ThreadPoolExecutor(max_workers=capacity, thread_name_prefix=f"{name}-lane")
+
+    def run(self, fn: Callable, *args, priority: str = "normal", timeout: Optional[float] = None):
+        with self.slot(priority, timeout):
+            return self.executor.submit(fn, *args).result()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        static_capacity: int = 8,
+        static_queue: int = 32,
+        render_capacity: int = 2,
+        render_queue: int = 4
+    ):
+        self.static = Lane("static", static_capacity, static_queue)
+        self.render = RenderLane("render", render_capacity, render_queue)
+
+    def max_threads(self) -> int:
+        """Request threads needed so admitted and queued work never waits on the executor itself"""
+        return (
+            self.static.capacity + self.static.max_queue
+            + self.render.capacity + self.render.max_queue
+        )
+
+    def stats(self) -> Dict:
+        return {"static": self.static.stats(), "render": self.render.stats()}
+
+
+admission = AdmissionController(
+    static_capacity=int(os.environ.get("SCRAPER_STATIC_CAPACITY", 8)),
+    static_queue=int(os.environ.get("SCRAPER_STATIC_QUEUE", 32)),
+    render_capacity=int(os.environ.get("SCRAPER_RENDER_CAPACITY", 2)),
+    render_queue=int(os.environ.get("SCRAPER_RENDER_QUEUE", 4))
+)
@@ -0,0 +1,110 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Set
+from urllib.parse import urlparse
+
+from backend.models import Section
+
+
+def fingerprint(raw_html: str) -> str:
+    """Fingerprint of a section element's markup, computed before content extraction"""
+    return hashlib.sha1(" ".join(raw_html.split()).encode("utf-8", errors="replace")).hexdigest()[:20]
+
+
+def site_key(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def is_reference(section: Section) -> bool:
+    """True for sections emitted as a bare boilerplate reference, without content"""
+    return section.boilerplateRef is not None and not section.rawHtml
+
+
+class _SiteEntry:
+    def __init__(self):
+        # fingerprint -> (label, pages it was seen on)
+        self.fingerprints: "OrderedDict[str, tuple]" = OrderedDict()
+        # confirmed fingerprint -> full section that references resolve to
+        self.canonical: Dict[str, Section] = {}
+
+
+class BoilerplateIndex:
+    """
+    Per-site index of section fingerprints. A section whose fingerprint shows
+    up on `min_pages` distinct pages of the same site (nav, header, footer,
+    ...) is boilerplate, and a full copy of it is kept as the canonical
+    section. Parses that opt in replace later occurrences with a reference
+    and skip their extraction; the canonical copy is returned alongside so
+    the reference can be resolved.
+    """
+
+    def __init__(
+        self,
+        min_pages: int = 2,
+        max_sites: int = 1000,
+        max_fingerprints: int = 500,
+        max_canonical: int = 32
+    ):
+        self.min_pages = min_pages
+        self.max_sites = max_sites
+        self.max_fingerprints = max_fingerprints
+        self.max_canonical = max_canonical
+        self._sites: "OrderedDict[str, _SiteEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def known(self, url: str) -> Dict[str, Section]:
+        """Confirmed boilerplate of the URL's site, mapped to its canonical sections"""
+        with self._lock:
+            entry = self._sites.get(site_key(url))
+            if not entry:
+                return {}
+            return dict(entry.canonical)
+
+    def observe(self, page_url: str, sections: List[Section], fingerprints: Dict[str, str]) -> List[Section]:
+        """
+        Record the fingerprints seen on a page and return the sections with
+        `boilerplateRef` set on those that are now confirmed recurring.
+        """
+        if not fingerprints:
+            return sections
+        site = site_key(page_url)
+        recurring: Set[str] = set()
+        with self._lock:
+            entry = self._sites.get(site)
+            if entry is None:
+                entry = self._sites[site] = _SiteEntry()
+                while len(self._sites) > self.max_sites:
+                    self._sites.popitem(last=False)
+            self._sites.move_to_end(site)
+
+            for section in sections:
+                fp = fingerprints.get(section.id)
+                if not fp:
+                    continue
+                label, pages = entry.fingerprints.get(fp, (section.label, frozenset()))
+                if len(pages) < self.min_pages and page_url not in pages:
+                    pages = pages | {page_url}
+                entry.fingerprints[fp] = (label, pages)
+                entry.fingerprints.move_to_end(fp)
+                if len(pages) >= self.min_pages:
+                    recurring.add(fp)
+                    if (
+                        fp not in entry.canonical
+                        and not is_reference(section)
+                        and len(entry.canonical) < self.max_canonical
+                    ):
+                        entry.canonical[fp] = section.model_copy(update={"boilerplateRef": fp})
+            while len(entry.fingerprints) > self.max_fingerprints:
+                evicted, _ = entry.fingerprints.popitem(last=False)
+                entry.canonical.pop(evicted, None)
+
+        return [
+            section.model_copy(update={"boilerplateRef": fingerprints[section.id]})
+            if section.boilerplateRef is None and fingerprints.get(section.id) in recurring
+            else section
+            for section in sections
+        ]
+
+
+boilerplate_index = BoilerplateIndex()
@@ -0,0 +1,295 @@
+import email.utils
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from backend.scraper.boilerplate import site_key
+
+# Subresources worth keeping between renders; documents and XHR are always fetched live
+CACHEABLE_TYPES = {"script", "stylesheet", "image", "font"}
+# Headers that describe the transfer rather than the body, or must not be replayed
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+MAX_AGE_RE = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove(*paths: str):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class SessionStateCache:
+    """
+    Per-site browser `storage_state` (cookies and localStorage) on disk.
+
+    A render that starts from a site's saved state skips the consent walls,
+    geo interstitials and redirect chains it already went through. Entries
+    expire after `ttl_seconds`; beyond `max_entries` the least recently saved
+    sites are evicted, and oversized states are not stored at all.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        ttl_seconds: float = 86400,
+        max_entries: int = 200,
+        max_state_bytes: int = 512 * 1024
+    ):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_state_bytes = max_state_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(site_key(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Saved state for the URL's site, or None if missing or expired"""
+        path = self._path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                _remove(path)
+                return None
+            with open(path, "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, state: Dict) -> bool:
+        data = json.dumps(state, separators=(",", ":")).encode("utf-8")
+        if len(data) > self.max_state_bytes or not (state.get("cookies") or state.get("origins")):
+            return False
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            _write_atomic(self._path(url), data)
+            self._evict()
+        return True
+
+    def _evict(self):
+        entries = []
+        for filename in os.listdir(self.root):
+            if filename.endswith(".json"):
+                path = os.path.join(self.root, filename)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass
+        entries.sort()
+        now = time.time()
+        for index, (mtime, path) in enumerate(entries):
+            if index < len(entries) - self.max_entries or now - mtime > self.ttl_seconds:
+                _remove(path)
+
+
+class SubresourceCache:
+    """
+    Disk cache for the browser's scripts, stylesheets, images and fonts.
+
+    Every render gets a fresh context and therefore an empty browser cache,
+    so this cache sits in front of the network through a context route.
+    Freshness follows `Cache-Control` max-age (or `Expires`); without either,
+    responses with `Last-Modified` get the RFC 9111 heuristic of a fraction
+    of their age, and the rest are not stored. Everything is capped at
+    `max_ttl`. This is a shared cache, so `private`, `no-store`, `no-cache`
+    and `Vary: *`/`Cookie` responses are never stored. Total size is bounded
+    by `max_bytes`, evicting least recently used entries first.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_entry_bytes: int = 8 * 1024 * 1024,
+        heuristic_fraction: float = 0.1,
+        max_ttl: float = 7 * 86400
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.heuristic_fraction = heuristic_fraction
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        # digest -> [size, last_used]; loaded from disk on first use
+        self._entries: Optional[Dict[str, list]] = None
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+
+    def _paths(self, digest: str):
+        base = os.path.join(self.root, digest[:2], digest)
+        return f"{base}.body", f"{base}.json"
+
+    def _index(self) -> Dict[str, list]:
+        if self._entries is None:
+            self._entries = {}
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if filename.endswith(".body"):
+                        try:
+                            stat = os.stat(os.path.join(dirpath, filename))
+                        except OSError:
+                            continue
+                        self._entries[filename[:-5]] = [stat.st_size, stat.st_mtime]
+                        self._size += stat.st_size
+        return self._entries
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Fresh cached response for a URL: {status, headers, body}"""
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        body_path, meta_path = self._paths(digest)
+        with self._lock:
+            entry = self._index().get(digest)
+            if entry is None:
+                self._misses += 1
+                return None
+            try:
+                with open(meta_path, "rb") as f:
+                    meta = json.loads(f.read())
+                if meta["expires"] < time.time():
+                    self._drop(digest)
+                    self._misses += 1
+                    return None
+                with open(body_path, "rb") as f:
+                    body = f.read()
+            except (OSError, ValueError, KeyError):
+                self._drop(digest)
+                self._misses += 1
+                return None
+            entry[1] = time.time()
+            self._hits += 1
+        return {"status": meta["status"], "headers": meta["headers"], "body": body}
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        ttl = self.freshness(headers)
+        if status != 200 or ttl <= 0 or len(body) > self.max_entry_bytes:
+            return False
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        body_path, meta_path = self._paths(digest)
+        meta = {
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+            "expires": time.time() + ttl,
+        }
+        with self._lock:
+            entries = self._index()
+            if digest in entries:
+                self._drop(digest)
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            _write_atomic(body_path, body)
+            _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+            entries[digest] = [len(body), time.time()]
+            self._size += len(body)
+            if self._size > self.max_bytes:
+                self._evict()
+        return True
+
+    def freshness(self, headers: Dict[str, str]) -> float:
+        """Seconds a response may be reused for; 0 means do not store"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        cache_control = headers.get("cache-control", "").lower()
+        vary = headers.get("vary", "").lower()
+        if "no-store" in cache_control or "private" in cache_control or "*" in vary or "cookie" in vary:
+            return 0
+        if "no-cache" in cache_control:
+            # Must be revalidated, which the route cannot do; treat as uncacheable
+            return 0
+        match = MAX_AGE_RE.search(cache_control)
+        if match:
+            ttl = float(match.group(1))
+        elif "expires" in headers:
+            ttl = self._http_date(headers["expires"]) - time.time()
+        elif "last-modified" in headers:
+            # Heuristic freshness (RFC 9111 section 4.2.2): a fraction of the time since last modification
+            last_modified = self._http_date(headers["last-modified"])
+            if not last_modified:
+                return 0
+            date = self._http_date(headers.get("date", "")) or time.time()
+            ttl = (date - last_modified) * self.heuristic_fraction
+        else:
+            return 0
+        return min(max(ttl, 0), self.max_ttl)
+
+    @staticmethod
+    def _http_date(value: str) -> float:
+        """Unix time of an HTTP date, or 0 if it does not parse"""
+        try:
+            return email.utils.parsedate_to_datetime(value).timestamp()
+        except (TypeError, ValueError, IndexError):
+            return 0.0
+
+    def handle(self, route, timeout_ms: Optional[float] = None):
+        """Playwright route handler: serve fresh entries from disk, store cacheable misses"""
+        request = route.request
+        try:
+            if request.method != "GET" or request.resource_type not in CACHEABLE_TYPES:
+                route.continue_()
+                return
+            cached = self.get(request.url)
+            if cached:
+                route.fulfill(status=cached["status"], headers=cached["headers"], body=cached["body"])
+                return
+            response = route.fetch(timeout=timeout_ms)
+            body = response.body()
+            route.fulfill(response=response, body=body)
+            self.put(request.url, response.status, response.headers, body)
+        except Exception as e:
+            print(f"Browser cache error for {request.url}: {e}")
+            try:
+                route.continue_()
+            except Exception:
+                pass
+
+    def _drop(self, digest: str):
+        entry = self._index().pop(digest, None)
+        if entry:
+            self._size -= entry[0]
+        _remove(*self._paths(digest))
+
+    def _evict(self):
+        # Down to 90% so a full cache does not evict on every store
+        target = self.max_bytes * 0.9
+        for digest, _ in sorted(self._index().items(), key=lambda item: item[1][1]):
+            if self._size <= target:
+                break
+            self._drop(digest)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._index()
+            return {"entries": len(entries), "bytes": self._size, "hits": self._hits, "misses": self._misses}
+
+
+_root = os.environ.get("SCRAPER_BROWSER_CACHE_DIR", os.path.join(os.getcwd(), ".scraper_browser"))
+
+session_cache: Optional[SessionStateCache] = None
+if os.environ.get("SCRAPER_BROWSER_SESSIONS", "0") == "1":
+    session_cache = SessionStateCache(
+        root=os.path.join(_root, "sessions"),
+        ttl_seconds=float(os.environ.get("SCRAPER_BROWSER_SESSION_TTL", 86400)),
+        max_entries=int(os.environ.get("SCRAPER_BROWSER_SESSION_MAX", 200))
+    )
+
+subresource_cache: Optional[SubresourceCache] = None
+if os.environ.get("SCRAPER_BROWSER_HTTP_CACHE", "0") == "1":
+    subresource_cache = SubresourceCache(
+        root=os.path.join(_root, "http"),
+        max_bytes=int(os.environ.get("SCRAPER_BROWSER_HTTP_CACHE_BYTES", 256 * 1024 * 1024)),
+        max_ttl=float(os.environ.get("SCRAPER_BROWSER_HTTP_CACHE_MAX_TTL", 7 * 86400))
+    )
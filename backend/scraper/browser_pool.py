@@ -0,0 +1,76 @@
+import threading
+from typing import Dict
+
+
+class BrowserPool:
+    """
+    Keeps one Chromium instance per worker thread alive across scrapes.
+
+    Playwright's sync API objects are bound to the thread that created them,
+    so the pool is thread-local: each executor thread launches its browser on
+    first use (or during warm-up) and reuses it afterwards. Scrapes only
+    create and close their own contexts.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._warm = 0
+        self._failures = 0
+
+    def browser(self, headless: bool = True):
+        local = self._local
+        browser = getattr(local, "browser", None)
+        if browser is not None and browser.is_connected() and local.headless == headless:
+            return browser
+
+        self.close_current()
+        from playwright.sync_api import sync_playwright
+
+        try:
+            local.playwright = sync_playwright().start()
+            local.browser = local.playwright.chromium.launch(headless=headless)
+            local.headless = headless
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            self.close_current()
+            raise
+        with self._lock:
+            self._warm += 1
+        return local.browser
+
+    def warm(self, headless: bool = True) -> bool:
+        try:
+            self.browser(headless)
+            return True
+        except Exception as e:
+            print(f"Browser warm-up failed: {e}")
+            return False
+
+    def close_current(self):
+        """Close the calling thread's browser, if any"""
+        local = self._local
+        browser = getattr(local, "browser", None)
+        playwright = getattr(local, "playwright", None)
+        local.browser = None
+        local.playwright = None
+        if browser is not None:
+            with self._lock:
+                self._warm = max(0, self._warm - 1)
+            try:
+                browser.close()
+            except:
+                pass
+        if playwright is not None:
+            try:
+                playwright.stop()
+            except:
+                pass
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {"warm": self._warm, "launchFailures": self._failures}
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,59 @@
+import os
+from typing import List, Optional, Tuple
+
+from backend.models import Section
+
+
+class ScrapeBudget:
+    """
+    Per-scrape memory limits. Hitting a limit degrades the result (truncated
+    flags plus an Error entry) instead of letting one page exhaust a worker.
+
+    - max_html_bytes: fetched or rendered HTML kept for parsing
+    - max_nodes: DOM nodes visited while extracting sections; also stops
+      infinite scroll once the live DOM grows past it
+    - max_result_bytes: serialized size of all sections in the result
+    """
+
+    def __init__(
+        self,
+        max_html_bytes: int = 5 * 1024 * 1024,
+        max_nodes: int = 100_000,
+        max_result_bytes: int = 4 * 1024 * 1024
+    ):
+        self.max_html_bytes = max_html_bytes
+        self.max_nodes = max_nodes
+        self.max_result_bytes = max_result_bytes
+
+    def clip_html(self, html: str) -> Tuple[str, bool]:
+        """Cut HTML to the byte budget; selectolax tolerates the unclosed tail"""
+        if len(html) * 4 <= self.max_html_bytes:
+            return html, False
+        data = html.encode("utf-8", errors="replace")
+        if len(data) <= self.max_html_bytes:
+            return html, False
+        return data[:self.max_html_bytes].decode("utf-8", errors="ignore"), True
+
+    def cap_sections(self, sections: List[Section]) -> Tuple[List[Section], bool]:
+        """Keep sections in document order until the result byte budget is spent"""
+        kept: List[Section] = []
+        total = 0
+        for section in sections:
+            size = len(section.model_dump_json())
+            if kept and total + size > self.max_result_bytes:
+                return kept, True
+            kept.append(section)
+            total += size
+        return kept, False
+
+
+def _env_int(name: str, default: int) -> int:
+    value: Optional[str] = os.environ.get(name)
+    return int(value) if value else default
+
+
+default_budget = ScrapeBudget(
+    max_html_bytes=_env_int("SCRAPER_MAX_HTML_BYTES", 5 * 1024 * 1024),
+    max_nodes=_env_int("SCRAPER_MAX_NODES", 100_000),
+    max_result_bytes=_env_int("SCRAPER_MAX_RESULT_BYTES", 4 * 1024 * 1024)
+)
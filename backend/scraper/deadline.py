@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """
+    One time budget per scrape that every phase draws its timeouts from.
+    `cancel()` (e.g. on client disconnect) expires it immediately and wakes
+    any phase sleeping on it.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def remaining(self) -> float:
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """Seconds for the next step: its own cap, or less if the deadline is closer"""
+        return min(cap, self.remaining())
+
+    def timeout_ms(self, cap_ms: float) -> float:
+        # Playwright treats 0 as "no timeout", so never hand it out
+        return max(1.0, min(cap_ms, self.remaining() * 1000))
+
+    def check(self, phase: str):
+        if self.expired():
+            reason = "cancelled" if self.cancelled else f"exceeded after {self.seconds:g}s"
+            raise DeadlineExceeded(f"Deadline {reason} during {phase}")
+
+    def sleep(self, seconds: float) -> bool:
+        """Sleep up to `seconds`, waking early on cancel. Returns False if the deadline ran out."""
+        self._cancelled.wait(self.timeout(seconds))
+        return not self.expired()
@@ -0,0 +1,205 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class HostState:
+    """Politeness and concurrency state for a single origin"""
+
+    def __init__(self, initial_limit: float, crawl_delay: float = 0.0):
+        self.limit = initial_limit
+        self.in_flight = 0
+        self.crawl_delay = crawl_delay
+        self.next_allowed = 0.0
+        # Request kind ("fetch", "render") -> moving average; a static fetch and a
+        # networkidle render differ by an order of magnitude, so each kind is
+        # only compared with itself when looking for latency spikes
+        self.avg_latency: Dict[str, float] = {}
+
+
+class HostScheduler:
+    """
+    Per-host politeness scheduler shared by the static and JS scrapers.
+
+    Concurrency per host is adjusted with AIMD: every healthy response adds
+    1/limit to the limit (roughly +1 per window), while throttling responses
+    (429/503), errors and latency spikes halve it. Retry-After and crawl-delay
+    push back the earliest time the next request to that host may start.
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(
+        self,
+        initial_limit: float = 2.0,
+        min_limit: float = 1.0,
+        max_limit: float = 8.0,
+        decrease_factor: float = 0.5,
+        latency_spike: float = 2.0,
+        max_retry_after: float = 120.0,
+        max_hosts: int = 1024
+    ):
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_spike = latency_spike
+        self.max_retry_after = max_retry_after
+        self.max_hosts = max_hosts
+        self._hosts: Dict[str, HostState] = {}
+        self._crawl_delays: Dict[str, float] = {}
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        parsed = urlparse(url)
+        return (parsed.netloc or parsed.path).lower()
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= self.max_hosts:
+                self._evict_idle()
+            state = HostState(self.initial_limit, self._crawl_delays.get(host, 0.0))
+            self._hosts[host] = state
+        return state
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for host, state in list(self._hosts.items()):
+            if state.in_flight == 0 and state.next_allowed <= now:
+                del self._hosts[host]
+
+    def set_crawl_delay(self, url_or_host: str, delay: float):
+        """Set a minimum delay (seconds) between request starts for a host"""
+        host = self.host_key(url_or_host) if "/" in url_or_host else url_or_host.lower()
+        with self._cond:
+            self._crawl_delays[host] = max(0.0, delay)
+            if host in self._hosts:
+                self._hosts[host].crawl_delay = max(0.0, delay)
+
+    def acquire(self, url: str, timeout: Optional[float] = None) -> bool:
+        """Block until a slot for the URL's host is free. Returns False on timeout."""
+        host = self.host_key(url)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while True:
+                state = self._state(host)
+                now = time.monotonic()
+                wait = None
+                if state.in_flight >= int(state.limit):
+                    pass
+                elif state.next_allowed > now:
+                    wait = state.next_allowed - now
+                else:
+                    state.in_flight += 1
+                    if state.crawl_delay:
+                        state.next_allowed = now + state.crawl_delay
+                    return True
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+    def release(
+        self,
+        url: str,
+        latency: Optional[float] = None,
+        status: Optional[int] = None,
+        retry_after: Optional[str] = None,
+        error: bool = False,
+        kind: str = "fetch"
+    ):
+        """Return a slot and feed the observed outcome into the AIMD controller"""
+        host = self.host_key(url)
+        with self._cond:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+
+            throttled = error or (status in self.THROTTLE_STATUSES)
+            slow = False
+            if latency is not None and not throttled:
+                average = state.avg_latency.get(kind)
+                if average is not None and latency > average * self.latency_spike:
+                    slow = True
+                state.avg_latency[kind] = latency if average is None else 0.8 * average + 0.2 * latency
+
+            if throttled or slow:
+                state.limit = max(self.min_limit, state.limit * self.decrease_factor)
+            else:
+                state.limit = min(self.max_limit, state.limit + 1.0 / state.limit)
+
+            delay = self._parse_retry_after(retry_after)
+            if delay:
+                state.next_allowed = max(state.next_allowed, time.monotonic() + delay)
+
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, url: str, timeout: Optional[float] = None, kind: str = "fetch"):
+        """
+        Context manager around acquire/release. The yielded dict may be filled
+        with "status" and "retry_after" by the caller before the block exits.
+        """
+        if not self.acquire(url, timeout=timeout):
+            raise TimeoutError(f"Timed out waiting for a request slot for {self.host_key(url)}")
+        outcome: Dict = {}
+        start = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            self.release(
+                url,
+                status=outcome.get("status"),
+                retry_after=outcome.get("retry_after"),
+                error=True,
+                kind=kind
+            )
+            raise
+        self.release(
+            url,
+            latency=time.monotonic() - start,
+            status=outcome.get("status"),
+            retry_after=outcome.get("retry_after"),
+            kind=kind
+        )
+
+    def _parse_retry_after(self, value: Optional[str]) -> float:
+        if not value:
+            return 0.0
+        value = value.strip()
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                when = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return 0.0
+            if when.tzinfo is None:
+                when = when.replace(tzinfo=timezone.utc)
+            seconds = (when - datetime.now(timezone.utc)).total_seconds()
+        return min(max(0.0, seconds), self.max_retry_after)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                host: {
+                    "limit": round(state.limit, 2),
+                    "inFlight": state.in_flight,
+                    "avgLatency": {kind: round(value, 3) for kind, value in state.avg_latency.items()},
+                    "blockedFor": round(max(0.0, state.next_allowed - now), 3),
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+# Shared between StaticScraper and JSScraper so both paths see the same limits
+host_scheduler = HostScheduler()
@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from backend.scraper.snapshots import content_hash
+
+
+class HtmlArchive:
+    """
+    Local content-addressed store for fetched and rendered HTML.
+
+    Bodies are zstd-compressed and stored once per SHA-256 digest under
+    `blobs/`, so identical pages share a blob. A SQLite index maps
+    URL + timestamp to a digest. Retention keeps at most `max_per_url`
+    documents per URL and nothing older than `max_age_days`; blobs no longer
+    referenced by the index are deleted during pruning.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_per_url: int = 10,
+        max_age_days: float = 30,
+        compression_level: int = 10
+    ):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.max_per_url = max_per_url
+        self.max_age_days = max_age_days
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.blob_dir, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.root, "index.db"), check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    final_url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS documents_url ON documents (url, stored_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS documents_digest ON documents (digest)")
+            self._conn.commit()
+        return self._conn
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.zst")
+
+    def _write_blob(self, digest: str, data: bytes):
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return
+        import zstandard
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(zstandard.ZstdCompressor(level=self.compression_level).compress(data))
+        os.replace(tmp_path, path)
+
+    def _read_blob(self, digest: str) -> str:
+        import zstandard
+
+        with open(self._blob_path(digest), "rb") as f:
+            data = zstandard.ZstdDecompressor().decompress(f.read())
+        return data.decode("utf-8", errors="replace")
+
+    def put(self, url: str, final_url: str, html: str, kind: str) -> str:
+        """Store a document ("static" or "rendered") and return its archive id"""
+        data = html.encode("utf-8", errors="replace")
+        digest = content_hash(html)
+        doc_id = uuid.uuid4().hex
+        with self._lock:
+            db = self._db()
+            self._write_blob(digest, data)
+            db.execute(
+                "INSERT INTO documents (id, url, final_url, kind, digest, size, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, url, final_url, kind, digest, len(data), time.time())
+            )
+            stale = db.execute(
+                "SELECT id, digest FROM documents WHERE url = ? ORDER BY stored_at DESC LIMIT -1 OFFSET ?",
+                (url, self.max_per_url)
+            ).fetchall()
+            db.executemany("DELETE FROM documents WHERE id = ?", [(row[0],) for row in stale])
+            db.commit()
+            # Only the blobs the dropped rows pointed at can have become unreferenced
+            self._remove_unreferenced({row[1] for row in stale})
+            self._puts += 1
+            due = self._puts % 100 == 0
+        if due:
+            self.prune()
+        return doc_id
+
+    def _remove_unreferenced(self, digests) -> int:
+        """Delete the blobs of digests no document references any more. Caller holds the lock."""
+        removed = 0
+        db = self._db()
+        for digest in digests:
+            if db.execute("SELECT 1 FROM documents WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                continue
+            try:
+                os.remove(self._blob_path(digest))
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def get(self, doc_id: str) -> Optional[Tuple[Dict, str]]:
+        """Return (record, html) for an archive id, or None if unknown"""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT id, url, final_url, kind, digest, size, stored_at FROM documents WHERE id = ?",
+                (doc_id,)
+            ).fetchone()
+            if not row:
+                return None
+            record = self._record(row)
+            try:
+                return record, self._read_blob(record["digest"])
+            except FileNotFoundError:
+                return None
+
+    def list(self, url: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        query = "SELECT id, url, final_url, kind, digest, size, stored_at FROM documents"
+        params: tuple = ()
+        if url:
+            query += " WHERE url = ? OR final_url = ?"
+            params = (url, url)
+        query += " ORDER BY stored_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._db().execute(query, params + (limit,)).fetchall()
+        return [self._record(row) for row in rows]
+
+    def prune(self) -> int:
+        """
+        Apply the age limit and delete every unreferenced blob. Walks the whole
+        blob tree, so it runs periodically rather than on every put.
+        """
+        removed = 0
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM documents WHERE stored_at < ?", (time.time() - self.max_age_days * 86400,))
+            db.commit()
+            referenced = {row[0] for row in db.execute("SELECT DISTINCT digest FROM documents")}
+            for dirpath, _, filenames in os.walk(self.blob_dir):
+                for filename in filenames:
+                    if filename.endswith(".zst") and filename[:-4] not in referenced:
+                        try:
+                            os.remove(os.path.join(dirpath, filename))
+                            removed += 1
+                        except OSError:
+                            pass
+        return removed
+
+    @staticmethod
+    def _record(row) -> Dict:
+        return {
+            "id": row[0],
+            "url": row[1],
+            "finalUrl": row[2],
+            "kind": row[3],
+            "digest": row[4],
+            "size": row[5],
+            "storedAt": row[6],
+        }
+
+
+html_archive: Optional[HtmlArchive] = None
+if os.environ.get("SCRAPER_ARCHIVE", "1") != "0":
+    html_archive = HtmlArchive(
+        root=os.environ.get("SCRAPER_ARCHIVE_DIR", os.path.join(os.getcwd(), ".scraper_archive")),
+        max_per_url=int(os.environ.get("SCRAPER_ARCHIVE_MAX_PER_URL", 10)),
+        max_age_days=float(os.environ.get("SCRAPER_ARCHIVE_MAX_AGE_DAYS", 30))
+    )
@@ -0,0 +1,184 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from selectolax.parser import HTMLParser, Node
+
+from backend.models import Section, Content, Link, Image
+
+
+# Globals that SPA frameworks assign their server-rendered state to
+STATE_ASSIGNMENT_RE = re.compile(
+    r"(?:window\.)?(__NUXT__|__INITIAL_STATE__|__PRELOADED_STATE__|__APOLLO_STATE__)\s*=\s*"
+)
+TAG_RE = re.compile(r"<[^>]+>")
+IMAGE_EXT_RE = re.compile(r"\.(?:png|jpe?g|gif|webp|avif|svg)(?:\?|$)", re.IGNORECASE)
+
+HEADING_KEYS = {"headline", "title", "name"}
+TEXT_KEYS = {"description", "text", "body", "content", "articlebody", "excerpt", "summary", "abstract"}
+LINK_KEYS = {"url", "href", "link", "permalink"}
+IMAGE_KEYS = {"image", "images", "thumbnailurl", "thumbnail", "src", "logo", "contenturl"}
+
+MAX_DEPTH = 12
+MAX_NODES = 20000
+
+
+def payload_kind(script: Node, text: str) -> Optional[str]:
+    """Return the hydration payload kind of a script tag, if it carries one"""
+    attrs = script.attributes
+    if attrs.get("id") == "__NEXT_DATA__":
+        return "next"
+    if (attrs.get("type") or "").lower() == "application/ld+json":
+        return "jsonld"
+    if text and "__" in text:
+        match = STATE_ASSIGNMENT_RE.search(text)
+        if match:
+            return "nuxt" if match.group(1) == "__NUXT__" else "state"
+    return None
+
+
+def _load_payload(kind: str, text: str) -> Optional[Any]:
+    try:
+        if kind in ("next", "jsonld"):
+            return json.loads(text)
+        match = STATE_ASSIGNMENT_RE.search(text)
+        start = match.end()
+        # Plain JSON literals only; IIFE-style payloads (common for __NUXT__) are skipped
+        value, _ = json.JSONDecoder().raw_decode(text[start:].lstrip())
+        return value
+    except (ValueError, AttributeError):
+        return None
+
+
+class _Collector:
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.headings: List[str] = []
+        self.text: List[str] = []
+        self.links: List[Link] = []
+        self.images: List[Image] = []
+        self.lists: List[List[str]] = []
+        self.section_type = "section"
+        self.nodes = 0
+        self._seen = set()
+
+    def walk(self, value: Any, key: str = "", parent: Optional[Dict] = None, depth: int = 0):
+        self.nodes += 1
+        if depth > MAX_DEPTH or self.nodes > MAX_NODES:
+            return
+        if isinstance(value, dict):
+            item_type = str(value.get("@type", "")).lower()
+            if item_type == "faqpage":
+                self.section_type = "faq"
+            elif item_type in ("product", "offer", "aggregateoffer") and self.section_type == "section":
+                self.section_type = "pricing"
+            for child_key, child in value.items():
+                self.walk(child, str(child_key), value, depth + 1)
+        elif isinstance(value, list):
+            strings = [v.strip() for v in value if isinstance(v, str) and v.strip()]
+            if len(strings) >= 2 and len(strings) == len(value) and key.lower() not in IMAGE_KEYS:
+                if all(len(s) <= 200 and not s.startswith(("http://", "https://", "/")) for s in strings):
+                    self.lists.append(strings[:100])
+                    return
+            for child in value:
+                self.walk(child, key, parent, depth + 1)
+        elif isinstance(value, str):
+            self._add_string(key.lower(), value.strip(), parent or {})
+
+    def _add_string(self, key: str, value: str, parent: Dict):
+        if not value or (key, value) in self._seen:
+            return
+        self._seen.add((key, value))
+
+        if key in IMAGE_KEYS or (key in LINK_KEYS and IMAGE_EXT_RE.search(value)):
+            if value.startswith(("http://", "https://", "/")):
+                alt = parent.get("alt") or parent.get("caption") or parent.get("name") or ""
+                self.images.append(Image(src=urljoin(self.base_url, value), alt=str(alt) if isinstance(alt, str) else ""))
+        elif key in LINK_KEYS:
+            if value.startswith(("http://", "https://", "/")):
+                text = parent.get("name") or parent.get("title") or parent.get("headline") or value
+                self.links.append(Link(text=str(text) if isinstance(text, str) else value, href=urljoin(self.base_url, value)))
+        elif key in HEADING_KEYS:
+            if len(value) <= 200 and len(self.headings) < 50:
+                self.headings.append(TAG_RE.sub("", value).strip())
+        elif key in TEXT_KEYS:
+            cleaned = " ".join(TAG_RE.sub(" ", value).split())
+            if len(cleaned) >= 20:
+                self.text.append(cleaned)
+
+
+def extract_hydration_sections(tree: HTMLParser, base_url: str) -> List[Section]:
+    """
+    Map embedded framework state (__NEXT_DATA__, __NUXT__,
+    window.__INITIAL_STATE__ and friends) and JSON-LD blocks into sections, so
+    SPA pages that ship their content in the initial HTML need no rendering.
+    """
+    sections: List[Section] = []
+    for index, (kind, payload, raw) in enumerate(find_payloads(tree)):
+        collector = _Collector(base_url)
+        if kind == "next" and isinstance(payload, dict):
+            # Page data lives under props.pageProps; the rest is router/build metadata
+            props = payload.get("props")
+            page_props = props.get("pageProps") if isinstance(props, dict) else None
+            if isinstance(page_props, (dict, list)):
+                payload = page_props
+        collector.walk(payload)
+
+        text = " ".join(collector.text)[:5000]
+        if not text and not collector.headings and not collector.lists:
+            continue
+
+        content = Content(
+            headings=collector.headings,
+            text=text,
+            links=collector.links[:200],
+            images=collector.images[:100],
+            lists=collector.lists[:50],
+        )
+        label = collector.headings[0] if collector.headings else {
+            "next": "Next.js page data",
+            "nuxt": "Nuxt state",
+            "state": "Initial state",
+            "jsonld": "Structured data",
+        }[kind]
+        if len(label) > 50:
+            label = label[:47] + "..."
+
+        truncated = len(raw) > 5000
+        sections.append(Section(
+            id=f"hydration-{kind}-{index}",
+            type=collector.section_type,
+            label=label,
+            sourceUrl=base_url,
+            content=content,
+            rawHtml=raw[:5000] + "..." if truncated else raw,
+            truncated=truncated
+        ))
+    return sections
+
+
+def find_payloads(tree: HTMLParser) -> List[Tuple[str, Any, str]]:
+    payloads = []
+    for script in tree.css("script"):
+        text = script.text() or ""
+        kind = payload_kind(script, text)
+        if not kind:
+            continue
+        payload = _load_payload(kind, text)
+        if payload is not None:
+            payloads.append((kind, payload, text))
+    return payloads
+
+
+def has_hydration_content(tree: HTMLParser, base_url: str = "", min_text: int = 200) -> bool:
+    """True when the embedded payloads carry enough content to skip rendering"""
+    try:
+        sections = extract_hydration_sections(tree, base_url)
+    except Exception:
+        # A malformed payload just means rendering decides, as in SectionParser
+        return False
+    for section in sections:
+        if len(section.content.text) >= min_text or (section.content.headings and section.content.text):
+            return True
+    return False
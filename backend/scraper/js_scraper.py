@@ -1,28 +1,62 @@
-from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext
+from playwright.sync_api import Page, Browser, BrowserContext
 from urllib.parse import urljoin, urlparse
 from typing import List, Dict, Optional, Tuple
 import time
 
+from backend.scraper.host_scheduler import HostScheduler, host_scheduler
+from backend.scraper.browser_pool import BrowserPool, browser_pool
+from backend.scraper.budget import ScrapeBudget, default_budget
+from backend.scraper.pagination import PAGINATION_SCRIPT, is_plain_href
+from backend.scraper.deadline import Deadline
+from backend.scraper.browser_cache import (
+    SessionStateCache, SubresourceCache, session_cache, subresource_cache
+)
+
 
 class JSScraper:
-    def __init__(self, timeout: int = 30000, headless: bool = True):
+    def __init__(
+        self,
+        timeout: int = 30000,
+        headless: bool = True,
+        scheduler: Optional[HostScheduler] = None,
+        pool: Optional[BrowserPool] = None,
+        budget: Optional[ScrapeBudget] = None,
+        deadline: Optional[Deadline] = None,
+        sessions: Optional[SessionStateCache] = None,
+        http_cache: Optional[SubresourceCache] = None
+    ):
         self.timeout = timeout
         self.headless = headless
-        self.playwright = None
+        self.scheduler = scheduler or host_scheduler
+        self.pool = pool or browser_pool
+        self.budget = budget or default_budget
+        self.deadline = deadline or Deadline(float("inf"))
+        # Both caches are opt-in and stay None when disabled
+        self.sessions = sessions or session_cache
+        self.http_cache = http_cache or subresource_cache
+        self.session_url: Optional[str] = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.pagination_urls: List[str] = []
     
-    def start(self):
-        if not self.playwright:
-            self.playwright = sync_playwright().start()
+    def start(self, url: Optional[str] = None):
         if not self.browser:
-            self.browser = self.playwright.chromium.launch(headless=self.headless)
+            self.browser = self.pool.browser(self.headless)
         if not self.context:
+            # Resume the site's saved cookies and localStorage, if any
+            storage_state = self.sessions.get(url) if self.sessions and url else None
             self.context = self.browser.new_context(
                 viewport={"width": 1920, "height": 1080},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+                storage_state=storage_state
             )
+            self.session_url = url
+            if self.http_cache:
+                self.context.route(
+                    "**/*",
+                    lambda route: self.http_cache.handle(route, self.deadline.timeout_ms(self.timeout))
+                )
         if not self.page:
             self.page = self.context.new_page()
     
@@ -34,7 +68,7 @@ class JSScraper:
         enable_scroll: bool = True
     ) -> Tuple[str, str, Dict]:
         if not self.page:
-            self.start()
+            self.start(url)
         
         interactions = {
             "clicks": [],
@@ -47,30 +81,44 @@ class JSScraper:
             if parsed.scheme not in ("http", "https"):
                 raise ValueError(f"Invalid URL scheme: {parsed.scheme}")
             
-            self.page.goto(url, wait_until="networkidle", timeout=self.timeout)
+            self._goto(url)
             final_url = self.page.url
             interactions["pages"][0] = final_url
             
             self._wait_for_content()
             
             if enable_clicks:
+                self.deadline.check("clicks")
                 self._perform_clicks(interactions)
             
             if enable_scroll:
+                self.deadline.check("scrolls")
                 self._perform_scrolls(interactions, max_depth)
+                self.pagination_urls = self._resolve_pagination_urls(max_depth - len(interactions["pages"]))
             
             html = self.page.content()
+            self._save_session()
             return html, final_url, interactions
             
         except Exception as e:
+            # Partial result: whatever the page holds when the error or deadline hit
             print(f"JS scrape error: {e}")
             html = self.page.content() if self.page else ""
-            final_url = url
+            final_url = self.page.url if self.page and self.page.url.startswith("http") else url
             return html, final_url, interactions
     
+    def _goto(self, url: str):
+        """Navigate the main page while holding a per-host slot"""
+        self.deadline.check("render")
+        with self.scheduler.slot(url, timeout=self.deadline.timeout(self.timeout / 1000), kind="render") as outcome:
+            response = self.page.goto(url, wait_until="networkidle", timeout=self.deadline.timeout_ms(self.timeout))
+            if response:
+                outcome["status"] = response.status
+                outcome["retry_after"] = response.headers.get("retry-after")
+    
     def _wait_for_content(self):
         try:
-            self.page.wait_for_load_state("networkidle", timeout=10000)
+            self.page.wait_for_load_state("networkidle", timeout=self.deadline.timeout_ms(10000))
         except:
             pass
         
@@ -78,14 +126,14 @@ class JSScraper:
             selectors = ["main", "article", "body", "[role='main']"]
             for selector in selectors:
                 try:
-                    self.page.wait_for_selector(selector, timeout=2000)
+                    self.page.wait_for_selector(selector, timeout=self.deadline.timeout_ms(2000))
                     break
                 except:
                     continue
         except:
             pass
         
-        time.sleep(1)
+        self.deadline.sleep(1)
     
     def _perform_clicks(self, interactions: Dict):
         tab_selectors = [
@@ -97,13 +145,15 @@ class JSScraper:
         ]
         
         for selector in tab_selectors:
+            if self.deadline.expired():
+                return
             try:
                 tabs = self.page.query_selector_all(selector)
                 for i, tab in enumerate(tabs[:3]):
                     if tab.is_visible():
-                        tab.click(timeout=2000)
+                        tab.click(timeout=self.deadline.timeout_ms(2000))
                         interactions["clicks"].append(f"{selector}[{i}]")
-                        time.sleep(1)
+                        self.deadline.sleep(1)
                         break
             except:
                 continue
@@ -119,13 +169,16 @@ class JSScraper:
         ]
         
         for selector in load_more_selectors:
+            if self.deadline.expired():
+                return
             try:
                 buttons = self.page.query_selector_all(selector)
                 for button in buttons[:2]:
                     if button.is_visible():
-                        button.click(timeout=2000)
+                        button.click(timeout=self.deadline.timeout_ms(2000))
                         interactions["clicks"].append(selector)
-                        time.sleep(2)
+                        if not self.deadline.sleep(2):
+                            return
             except:
                 continue
     
@@ -135,11 +188,18 @@ class JSScraper:
         same_height_count = 0
         
         while scroll_count < max_depth:
+            if self.deadline.expired():
+                break
+            if self._dom_over_budget():
+                interactions["domLimitReached"] = True
+                break
+            
             self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
             interactions["scrolls"] += 1
             scroll_count += 1
             
-            time.sleep(2)
+            if not self.deadline.sleep(2):
+                break
             
             current_height = self.page.evaluate("document.body.scrollHeight")
             if current_height == last_height:
@@ -156,20 +216,126 @@ class JSScraper:
                     next_link = next_links[0]
                     if next_link.is_visible():
                         href = next_link.get_attribute("href")
-                        if href:
+                        # Plain next-page hrefs are resolved up front and fetched in parallel
+                        # afterwards; only script-driven pagination is clicked through here
+                        if href and not is_plain_href(href):
                             next_url = urljoin(self.page.url, href)
                             if next_url not in interactions["pages"] and len(interactions["pages"]) < max_depth:
                                 interactions["clicks"].append(f'a[href="{href}"]')
-                                next_link.click(timeout=3000)
+                                next_link.click(timeout=self.deadline.timeout_ms(3000))
                                 interactions["pages"].append(next_url)
-                                time.sleep(2)
+                                self.deadline.sleep(2)
                                 scroll_count = 0
                                 continue
                 except:
                     pass
     
+    def _resolve_pagination_urls(self, max_pages: int) -> List[str]:
+        if max_pages <= 0:
+            return []
+        try:
+            return self.page.evaluate(PAGINATION_SCRIPT, max_pages)
+        except Exception as e:
+            print(f"Pagination resolve error: {e}")
+            return []
+    
+    def render_pages(self, urls: List[str]) -> List[Tuple[str, str, str]]:
+        """
+        Render several URLs in parallel tabs of this scraper's context.
+        Tabs are opened in batches of as many per-host slots as the scheduler
+        grants: only the first tab of a batch waits for a slot, the others take
+        one only if it is free right away, so this thread never blocks on slots
+        it is itself holding. Within a batch all navigations are started (up to
+        response commit) before waiting on any of them, so the loads overlap.
+        Returns (url, final_url, html).
+        """
+        if not self.context:
+            self.start()
+        
+        results = []
+        queue = list(urls)
+        while queue and not self.deadline.expired():
+            tabs = []
+            while queue and not self.deadline.expired():
+                url = queue[0]
+                timeout = 0 if tabs else self.deadline.timeout(self.timeout / 1000)
+                if not self.scheduler.acquire(url, timeout=timeout):
+                    if tabs:
+                        # Host is at its limit; render this one in the next batch
+                        break
+                    queue.pop(0)
+                    continue
+                queue.pop(0)
+                tab = self._open_tab(url)
+                if tab:
+                    tabs.append(tab)
+            results.extend(self._finish_tabs(tabs))
+        return results
+    
+    def _open_tab(self, url: str) -> Optional[Tuple]:
+        """Start loading a URL in a new tab; the caller holds the URL's host slot"""
+        started = time.monotonic()
+        tab = None
+        try:
+            tab = self.context.new_page()
+            response = tab.goto(url, wait_until="commit", timeout=self.deadline.timeout_ms(self.timeout))
+            return url, tab, started, response
+        except Exception as e:
+            print(f"JS pagination error for {url}: {e}")
+            self.scheduler.release(url, error=True, kind="render")
+            if tab:
+                try:
+                    tab.close()
+                except:
+                    pass
+            return None
+    
+    def _finish_tabs(self, tabs: List[Tuple]) -> List[Tuple[str, str, str]]:
+        results = []
+        for url, tab, started, response in tabs:
+            failed = False
+            try:
+                try:
+                    tab.wait_for_load_state("networkidle", timeout=self.deadline.timeout_ms(self.timeout))
+                except:
+                    pass
+                results.append((url, tab.url, tab.content()))
+            except Exception as e:
+                print(f"JS pagination error for {url}: {e}")
+                failed = True
+            finally:
+                self.scheduler.release(
+                    url,
+                    latency=time.monotonic() - started,
+                    status=response.status if response else None,
+                    retry_after=response.headers.get("retry-after") if response else None,
+                    error=failed,
+                    kind="render"
+                )
+                try:
+                    tab.close()
+                except:
+                    pass
+        return results
+    
+    def _save_session(self):
+        """Store the context's cookies and localStorage for the next render of this site"""
+        if not (self.sessions and self.session_url and self.context):
+            return
+        try:
+            self.sessions.put(self.session_url, self.context.storage_state())
+        except Exception as e:
+            print(f"Session save error: {e}")
+    
+    def _dom_over_budget(self) -> bool:
+        try:
+            nodes = self.page.evaluate("document.getElementsByTagName('*').length")
+        except:
+            return False
+        return nodes > self.budget.max_nodes
+    
     def close(self):
-        """Close browser and cleanup"""
+        """Close the page and context; the browser stays in the pool"""
         try:
             if self.page:
                 self.page.close()
@@ -180,16 +346,9 @@ class JSScraper:
                 self.context.close()
         except:
             pass
-        try:
-            if self.browser:
-                self.browser.close()
-        except:
-            pass
-        try:
-            if self.playwright:
-                self.playwright.stop()
-        except:
-            pass
+        self.page = None
+        self.context = None
+        self.browser = None
     
     def __enter__(self):
         return self
@@ -0,0 +1,84 @@
+import re
+from typing import List
+from urllib.parse import urljoin, urldefrag
+
+from selectolax.parser import HTMLParser
+
+
+PAGINATION_CONTAINERS = (
+    '.pagination a, .pager a, [class*="pagination"] a, [class*="pager"] a, '
+    'nav[aria-label*="pagination" i] a, nav[aria-label*="Pagination"] a'
+)
+NEXT_TEXT_RE = re.compile(r"^next\b", re.IGNORECASE)
+
+# Same rules as find_pagination_urls, evaluated against the live DOM
+PAGINATION_SCRIPT = """
+(maxPages) => {
+    const current = location.href.split('#')[0];
+    const seen = new Set([current]);
+    const numbered = [];
+    const next = [];
+    const add = (list, el, key) => {
+        const href = el && el.href ? String(el.href).split('#')[0] : '';
+        if (!/^https?:/.test(href) || seen.has(href)) return;
+        seen.add(href);
+        list.push([key, href]);
+    };
+    for (const el of document.querySelectorAll('a[rel="next"], link[rel="next"]')) add(next, el, 0);
+    for (const a of document.querySelectorAll('a[href]')) {
+        if (/^next\\b/i.test((a.textContent || '').trim())) add(next, a, 0);
+    }
+    for (const a of document.querySelectorAll('%s')) {
+        const text = (a.textContent || '').trim();
+        if (/^\\d+$/.test(text) && Number(text) > 1) add(numbered, a, Number(text));
+    }
+    numbered.sort((a, b) => a[0] - b[0]);
+    return next.concat(numbered).map(([, href]) => href).slice(0, maxPages);
+}
+""" % PAGINATION_CONTAINERS.replace("'", "\\'")
+
+
+def is_plain_href(href: str) -> bool:
+    """True for hrefs that navigate to another document (not '#...' or javascript:)"""
+    href = (href or "").strip()
+    return bool(href) and not href.startswith("#") and not href.lower().startswith("javascript:")
+
+
+def find_pagination_urls(html: str, page_url: str, max_pages: int = 10) -> List[str]:
+    """
+    Resolve next-page URLs from static HTML: rel="next" links, "Next" anchors
+    and numbered links inside pagination containers, in that order.
+    """
+    tree = HTMLParser(html)
+    current = urldefrag(page_url)[0]
+    seen = {current}
+    next_urls: List[str] = []
+    numbered = []
+
+    def resolve(href: str) -> str:
+        if not is_plain_href(href):
+            return ""
+        url = urldefrag(urljoin(page_url, href))[0]
+        if not url.startswith(("http://", "https://")) or url in seen:
+            return ""
+        seen.add(url)
+        return url
+
+    for node in tree.css('a[rel="next"], link[rel="next"]'):
+        url = resolve(node.attributes.get("href") or "")
+        if url:
+            next_urls.append(url)
+    for node in tree.css("a[href]"):
+        if NEXT_TEXT_RE.match(node.text().strip()):
+            url = resolve(node.attributes.get("href") or "")
+            if url:
+                next_urls.append(url)
+    for node in tree.css(PAGINATION_CONTAINERS.replace(' i]', ']')):
+        text = node.text().strip()
+        if text.isdigit() and int(text) > 1:
+            url = resolve(node.attributes.get("href") or "")
+            if url:
+                numbered.append((int(text), url))
+
+    numbered.sort()
+    return (next_urls + [url for _, url in numbered])[:max_pages]
@@ -0,0 +1,187 @@
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Union
+
+from backend.models import Section
+from backend.scraper.section_parser import SectionParser
+from backend.scraper.static_scraper import StaticScraper
+from backend.scraper.deadline import DeadlineExceeded
+
+# ProcessPoolExecutor(max_tasks_per_child=...) was added in Python 3.11
+NATIVE_TASK_LIMIT = sys.version_info >= (3, 11)
+
+
+class ParsedDocument:
+    def __init__(
+        self,
+        meta: Dict,
+        sufficient: bool,
+        sections: List[Section],
+        truncated: bool = False,
+        fingerprints: Optional[Dict[str, str]] = None
+    ):
+        self.meta = meta
+        self.sufficient = sufficient
+        self.sections = sections
+        self.truncated = truncated
+        self.fingerprints = fingerprints or {}
+
+
+def _parse(
+    html: str,
+    base_url: str,
+    check_static: bool = False,
+    hydration: bool = True,
+    max_nodes: Optional[int] = None,
+    boilerplate: Optional[Dict[str, str]] = None
+) -> ParsedDocument:
+    meta = StaticScraper.extract_meta(html, base_url)
+    sufficient = StaticScraper.is_static_sufficient(html) if check_static else True
+    if not sufficient:
+        return ParsedDocument(meta, sufficient, [])
+    parser = SectionParser(base_url, include_hydration=hydration, max_nodes=max_nodes, boilerplate=boilerplate)
+    sections = parser.parse(html)
+    return ParsedDocument(meta, sufficient, sections, parser.truncated, parser.fingerprints)
+
+
+def parse_document(
+    html: Union[bytes, str],
+    base_url: str,
+    check_static: bool = False,
+    hydration: bool = True,
+    max_nodes: Optional[int] = None,
+    boilerplate: Optional[Dict[str, str]] = None
+) -> Dict:
+    """
+    Meta extraction, the static-sufficiency check and section parsing in one
+    pass, for use inside a pool worker. The result only holds plain dicts so
+    it pickles cheaply back to the parent process.
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    document = _parse(html, base_url, check_static, hydration, max_nodes, boilerplate)
+    return {
+        "meta": document.meta,
+        "sufficient": document.sufficient,
+        "sections": [section.model_dump() for section in document.sections],
+        "truncated": document.truncated,
+        "fingerprints": document.fingerprints,
+    }
+
+
+class ParsePool:
+    """
+    Offloads CPU-bound HTML parsing to a process pool so a large page does not
+    hold the GIL for every other scrape in the server. Documents smaller than
+    `inline_threshold` bytes are parsed in the calling thread, where pickling
+    overhead would outweigh the gain. Workers are recycled after
+    `max_tasks_per_child` documents to keep parser memory from accumulating;
+    before Python 3.11 the whole pool is replaced after that many documents
+    per worker instead.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        inline_threshold: int = 256 * 1024,
+        max_tasks_per_child: int = 200
+    ):
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.inline_threshold = inline_threshold
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._submitted = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        retired = None
+        with self._lock:
+            if (
+                not NATIVE_TASK_LIMIT
+                and self._executor is not None
+                and self.max_tasks_per_child
+                and self._submitted >= self.max_tasks_per_child * self.max_workers
+            ):
+                # Queued documents still finish on the retired pool
+                retired, self._executor = self._executor, None
+            if self._executor is None:
+                # max_tasks_per_child is incompatible with fork, and forking a
+                # threaded server is unsafe anyway
+                options = {"max_tasks_per_child": self.max_tasks_per_child} if NATIVE_TASK_LIMIT else {}
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    **options
+                )
+                self._submitted = 0
+            self._submitted += 1
+            executor = self._executor
+        if retired:
+            retired.shutdown(wait=False)
+        return executor
+
+    def parse(
+        self,
+        html: str,
+        base_url: str,
+        check_static: bool = False,
+        hydration: bool = True,
+        max_nodes: Optional[int] = None,
+        boilerplate: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> ParsedDocument:
+        # Character count is a cheap lower bound on the encoded size
+        if self.max_workers <= 0 or len(html) < self.inline_threshold:
+            return _parse(html, base_url, check_static, hydration, max_nodes, boilerplate)
+
+        try:
+            executor = self._get_executor()
+        except Exception as e:
+            print(f"Parse pool unavailable, parsing inline from now on: {e}")
+            self.max_workers = 0
+            return _parse(html, base_url, check_static, hydration, max_nodes, boilerplate)
+
+        try:
+            data = html.encode("utf-8", errors="replace")
+            future = executor.submit(
+                parse_document, data, base_url, check_static, hydration, max_nodes, boilerplate
+            )
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise DeadlineExceeded("Deadline exceeded during parse")
+        except BrokenProcessPool as e:
+            print(f"Parse pool broken, parsing inline: {e}")
+            self._reset()
+            return _parse(html, base_url, check_static, hydration, max_nodes, boilerplate)
+
+        return ParsedDocument(
+            meta=result["meta"],
+            sufficient=result["sufficient"],
+            sections=[Section.model_validate(section) for section in result["sections"]],
+            truncated=result["truncated"],
+            fingerprints=result["fingerprints"]
+        )
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+parse_pool = ParsePool(
+    max_workers=int(os.environ["SCRAPER_PARSE_WORKERS"]) if os.environ.get("SCRAPER_PARSE_WORKERS") else None,
+    inline_threshold=int(os.environ.get("SCRAPER_PARSE_INLINE_BYTES", 256 * 1024)),
+    max_tasks_per_child=int(os.environ.get("SCRAPER_PARSE_MAX_TASKS_PER_CHILD", 200))
+)
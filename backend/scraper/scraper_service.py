@@ -1,19 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from backend.scraper.static_scraper import StaticScraper
-from backend.scraper.js_scraper import JSScraper
-from backend.scraper.section_parser import SectionParser
+from backend.scraper.parse_pool import ParsePool, parse_pool
+from backend.scraper.html_archive import HtmlArchive, html_archive
+from backend.scraper.budget import ScrapeBudget, default_budget
+from backend.scraper.pagination import find_pagination_urls
+from backend.scraper.boilerplate import BoilerplateIndex, boilerplate_index, is_reference
+from backend.scraper.deadline import Deadline, DeadlineExceeded
+from backend.scraper.admission import AdmissionController, LaneSaturated, LaneTimeout, admission
+from backend.scraper.snapshots import Snapshot, SnapshotIndex, content_hash, snapshot_index
 from backend.models import ScrapeResult, Meta, Section, Interactions, Error, Content, Link, Image
 
 
 class ScraperService:
-    def __init__(self):
+    def __init__(
+        self,
+        snapshots: Optional[SnapshotIndex] = None,
+        parser_pool: Optional[ParsePool] = None,
+        archive: Optional[HtmlArchive] = None,
+        budget: Optional[ScrapeBudget] = None,
+        boilerplate: Optional[BoilerplateIndex] = None,
+        admission_controller: Optional[AdmissionController] = None
+    ):
         self.static_scraper = None
         self.js_scraper = None
+        self.snapshots = snapshots or snapshot_index
+        self.parser_pool = parser_pool or parse_pool
+        self.archive = archive or html_archive
+        self.budget = budget or default_budget
+        self.boilerplate = boilerplate or boilerplate_index
+        self.admission = admission_controller or admission
     
-    def scrape(self, url: str) -> ScrapeResult:
+    MAX_PAGES = 3
+    DEFAULT_DEADLINE = 60.0
+    # Parsing HTML that was already fetched gets at least this long, even past
+    # the deadline, so a partial result is not thrown away at the last step
+    PARSE_GRACE_SECONDS = 5.0
+    
+    def scrape(
+        self,
+        url: str,
+        previous_snapshot_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        priority: str = "normal",
+        dedupe_boilerplate: bool = False
+    ) -> ScrapeResult:
+        deadline = deadline or Deadline(self.DEFAULT_DEADLINE)
         errors: List[Error] = []
         strategy = "static"
         html = None
@@ -21,6 +57,14 @@ class ScraperService:
         meta_data = {}
         sections_data: List[Section] = []
         interactions = Interactions()
+        static_hash = None
+        rendered_hash = None
+        reused: Optional[Snapshot] = None
+        previous = self.snapshots.latest(url)
+        archive_ids: List[str] = []
+        # Canonical sections for every boilerplate reference emitted by this scrape
+        boilerplate_refs: Dict[str, Section] = {}
+        truncated = False
         
         parsed = urlparse(url)
         if parsed.scheme not in ("http", "https"):
@@ -30,51 +74,104 @@ class ScraperService:
             ))
             return self._create_empty_result(url, errors)
         
+        # Raises LaneSaturated (429 upstream) when the static lane's queue is full
+        try:
+            self.admission.static.acquire(priority, timeout=deadline.remaining())
+        except LaneTimeout:
+            errors.append(Error(
+                message="Deadline reached while queued for fetching; nothing was scraped.",
+                phase="fetch"
+            ))
+            return self._create_empty_result(url, errors)
+        static_started = time.monotonic()
         try:
             with StaticScraper() as static_scraper:
-                result = static_scraper.fetch(url)
+                result = static_scraper.fetch(url, deadline=deadline)
                 if result:
                     html, final_url = result
-                    meta_data = static_scraper.extract_meta(html, final_url)
+                    html, clipped = self.budget.clip_html(html)
+                    if clipped:
+                        truncated = True
+                        errors.append(Error(
+                            message=f"Fetched HTML exceeded {self.budget.max_html_bytes} bytes and was truncated.",
+                            phase="fetch"
+                        ))
+                    static_hash = content_hash(html)
+                    self._archive(url, final_url, html, "static", archive_ids)
                     
-                    if static_scraper.is_static_sufficient(html):
-                        parser = SectionParser(final_url)
-                        sections_data = parser.parse(html)
-                        strategy = "static"
+                    if previous and previous.strategy == "static" and previous.static_hash == static_hash:
+                        # Body unchanged since the last static scrape: skip parsing entirely
+                        reused = previous
+                        meta_data = previous.meta
+                        sections_data = previous.sections
+                        boilerplate_refs.update(previous.boilerplate)
                     else:
-                        strategy = "js_fallback"
-                        html = None
+                        document = self._parse_page(
+                            html,
+                            final_url,
+                            deadline,
+                            check_static=True,
+                            boilerplate_refs=boilerplate_refs if dedupe_boilerplate else None
+                        )
+                        meta_data = document.meta
+                        if document.sufficient:
+                            sections_data = document.sections
+                            truncated = self._check_node_budget(document, errors) or truncated
+                            strategy = "static"
+                        else:
+                            strategy = "js_fallback"
+                            html = None
+                elif deadline.expired():
+                    errors.append(Error(
+                        message="Deadline reached during the static fetch; no page content was retrieved.",
+                        phase="fetch"
+                    ))
         except Exception as e:
             errors.append(Error(
                 message=f"Static scraping failed: {str(e)}",
                 phase="fetch"
             ))
             strategy = "js_fallback"
+        finally:
+            self.admission.static.release(time.monotonic() - static_started)
         
-        if strategy == "js_fallback" or (html and len(sections_data) == 0):
+        needs_render = strategy == "js_fallback" or (html and len(sections_data) == 0)
+        if needs_render and deadline.expired():
+            errors.append(Error(
+                message="Deadline reached before JS rendering; returning the partial result.",
+                phase="render"
+            ))
+        elif needs_render:
             try:
-                with JSScraper(headless=True) as js_scraper:
-                    html, final_url, interactions_dict = js_scraper.scrape(
-                        url,
-                        max_depth=3,
-                        enable_clicks=True,
-                        enable_scroll=True
-                    )
-                    
-                    if not meta_data:
-                        with StaticScraper() as static_scraper:
-                            meta_data = static_scraper.extract_meta(html, final_url)
-                    
-                    parser = SectionParser(final_url)
-                    sections_data = parser.parse(html)
-                    
-                    interactions = Interactions(
-                        clicks=interactions_dict.get("clicks", []),
-                        scrolls=interactions_dict.get("scrolls", 0),
-                        pages=interactions_dict.get("pages", [final_url])
-                    )
-                    
-                    strategy = "js"
+                rendered = self.admission.render.run(
+                    self._render,
+                    url,
+                    deadline,
+                    previous,
+                    meta_data,
+                    errors,
+                    archive_ids,
+                    boilerplate_refs,
+                    dedupe_boilerplate,
+                    priority=priority,
+                    timeout=deadline.remaining()
+                )
+                html = rendered["html"]
+                final_url = rendered["final_url"]
+                meta_data = rendered["meta"]
+                sections_data = rendered["sections"]
+                interactions = rendered["interactions"]
+                reused = rendered["reused"]
+                rendered_hash = rendered["rendered_hash"]
+                truncated = rendered["truncated"] or truncated
+                strategy = "js"
+            except LaneSaturated:
+                raise
+            except LaneTimeout:
+                errors.append(Error(
+                    message="Deadline reached while queued for JS rendering; returning the partial result.",
+                    phase="render"
+                ))
             except Exception as e:
                 errors.append(Error(
                     message=f"JS scraping failed: {str(e)}",
@@ -108,6 +205,14 @@ class ScraperService:
                 truncated=len(html) > 1000 if html else False
             )]
         
+        sections_data, capped = self.budget.cap_sections(sections_data)
+        if capped:
+            truncated = True
+            errors.append(Error(
+                message=f"Result exceeded {self.budget.max_result_bytes} bytes; later sections were dropped.",
+                phase="parse"
+            ))
+        
         meta = Meta(
             title=meta_data.get("title", ""),
             description=meta_data.get("description", ""),
@@ -115,17 +220,298 @@ class ScraperService:
             canonical=meta_data.get("canonical")
         )
         
+        if reused:
+            snapshot = reused
+        else:
+            snapshot = self.snapshots.record(
+                Snapshot(
+                    url, strategy, meta_data, sections_data, static_hash, rendered_hash,
+                    self._referenced(sections_data, boilerplate_refs)
+                ),
+                final_url
+            )
+        
         result = ScrapeResult(
             url=final_url,
             scrapedAt=datetime.utcnow().isoformat() + "Z",
             meta=meta,
             sections=sections_data,
             interactions=interactions,
-            errors=errors
+            errors=errors,
+            snapshotId=snapshot.id,
+            unchanged=reused is not None,
+            archiveIds=archive_ids,
+            truncated=truncated
         )
         
+        if previous_snapshot_id:
+            base = self.snapshots.get(previous_snapshot_id)
+            if base:
+                result.diff, result.sections = self.snapshots.diff(base, snapshot)
+            else:
+                result.errors.append(Error(
+                    message=f"Unknown snapshot id: {previous_snapshot_id}. Returning the full result.",
+                    phase="validation"
+                ))
+        
+        result.boilerplate = self._referenced(result.sections, boilerplate_refs)
         return result
     
+    def extract_from_archive(self, archive_id: str) -> Optional[ScrapeResult]:
+        """Re-run extraction on an archived document without touching the network"""
+        if not self.archive:
+            return None
+        stored = self.archive.get(archive_id)
+        if not stored:
+            return None
+        record, html = stored
+        final_url = record["finalUrl"]
+        errors: List[Error] = []
+        
+        document = self.parser_pool.parse(html, final_url, hydration=record["kind"] == "static")
+        if not document.sections:
+            errors.append(Error(
+                message="No sections could be extracted from the archived document.",
+                phase="parse"
+            ))
+        
+        return ScrapeResult(
+            url=final_url,
+            scrapedAt=datetime.utcfromtimestamp(record["storedAt"]).isoformat() + "Z",
+            meta=Meta(**document.meta),
+            sections=document.sections,
+            interactions=Interactions(pages=[final_url]),
+            errors=errors,
+            archiveIds=[archive_id]
+        )
+    
+    def _render(
+        self,
+        url: str,
+        deadline: Deadline,
+        previous: Optional[Snapshot],
+        meta_data: Dict,
+        errors: List[Error],
+        archive_ids: List[str],
+        boilerplate_refs: Dict[str, Section],
+        dedupe_boilerplate: bool
+    ) -> Dict:
+        """JS rendering phase; runs on a render-lane thread, which owns its pooled browser"""
+        # Imported here so static-only workers never load Playwright
+        from backend.scraper.js_scraper import JSScraper
+        
+        truncated = False
+        reused = None
+        with JSScraper(headless=True, budget=self.budget, deadline=deadline) as js_scraper:
+            html, final_url, interactions_dict = js_scraper.scrape(
+                url,
+                max_depth=self.MAX_PAGES,
+                enable_clicks=True,
+                enable_scroll=True
+            )
+            
+            if deadline.expired():
+                errors.append(Error(
+                    message="Deadline reached during rendering; interactions were cut short.",
+                    phase="render"
+                ))
+            if interactions_dict.get("domLimitReached"):
+                truncated = True
+                errors.append(Error(
+                    message=f"Stopped scrolling: DOM exceeded {self.budget.max_nodes} nodes.",
+                    phase="render"
+                ))
+            html, clipped = self.budget.clip_html(html)
+            if clipped:
+                truncated = True
+                errors.append(Error(
+                    message=f"Rendered HTML exceeded {self.budget.max_html_bytes} bytes and was truncated.",
+                    phase="render"
+                ))
+            rendered_hash = content_hash(html)
+            self._archive(url, final_url, html, "rendered", archive_ids)
+            if previous and previous.rendered_hash == rendered_hash:
+                reused = previous
+                meta_data = meta_data or previous.meta
+                sections_data = previous.sections
+                boilerplate_refs.update(previous.boilerplate)
+            else:
+                document = self._parse_page(
+                    html,
+                    final_url,
+                    deadline,
+                    hydration=False,
+                    boilerplate_refs=boilerplate_refs if dedupe_boilerplate else None
+                )
+                meta_data = meta_data or document.meta
+                sections_data = document.sections
+                truncated = self._check_node_budget(document, errors) or truncated
+                
+                if js_scraper.pagination_urls and not deadline.expired():
+                    extra_pages, extra_sections = self._scrape_pagination(
+                        js_scraper,
+                        deadline,
+                        url,
+                        interactions_dict["pages"],
+                        js_scraper.pagination_urls,
+                        self.MAX_PAGES - len(interactions_dict["pages"]),
+                        archive_ids,
+                        boilerplate_refs
+                    )
+                    interactions_dict["pages"].extend(extra_pages)
+                    sections_data = sections_data + extra_sections
+        
+        return {
+            "html": html,
+            "final_url": final_url,
+            "meta": meta_data,
+            "sections": sections_data,
+            "interactions": Interactions(
+                clicks=interactions_dict.get("clicks", []),
+                scrolls=interactions_dict.get("scrolls", 0),
+                pages=interactions_dict.get("pages", [final_url])
+            ),
+            "reused": reused,
+            "rendered_hash": rendered_hash,
+            "truncated": truncated,
+        }
+    
+    def _scrape_pagination(
+        self,
+        js_scraper,
+        deadline: Deadline,
+        url: str,
+        visited: List[str],
+        page_urls: List[str],
+        max_pages: int,
+        archive_ids: List[str],
+        boilerplate_refs: Dict[str, Section]
+    ) -> Tuple[List[str], List[Section]]:
+        """
+        Fetch next pages concurrently: statically when the static HTML is
+        sufficient, otherwise in parallel tabs of the JS scraper's context.
+        Each page is parsed with its own URL as sourceUrl, and the site's
+        known boilerplate on these pages is emitted as references. Returns
+        the page URLs visited and their sections.
+        """
+        pages: List[str] = []
+        sections: List[Section] = []
+        seen = set(page_urls) | set(visited) | {url}
+        queue = [page_url for page_url in page_urls if page_url not in visited]
+        
+        try:
+            while queue and len(pages) < max_pages and not deadline.expired():
+                batch, queue = queue[:max_pages - len(pages)], []
+                with ThreadPoolExecutor(max_workers=len(batch)) as pool:
+                    fetched = list(pool.map(lambda page_url: self._fetch_static_page(page_url, deadline), batch))
+            
+                documents = []
+                needs_render = []
+                for page_url, result in zip(batch, fetched):
+                    if result:
+                        final_url, page_html = result
+                        document = self._parse_page(
+                            page_html, final_url, deadline, check_static=True, boilerplate_refs=boilerplate_refs
+                        )
+                        if document.sufficient and document.sections:
+                            self._archive(url, final_url, page_html, "static", archive_ids)
+                            documents.append((final_url, page_html, document))
+                            continue
+                    needs_render.append(page_url)
+            
+                if needs_render and not deadline.expired():
+                    for page_url, final_url, page_html in js_scraper.render_pages(needs_render):
+                        page_html, _ = self.budget.clip_html(page_html)
+                        self._archive(url, final_url, page_html, "rendered", archive_ids)
+                        document = self._parse_page(
+                            page_html, final_url, deadline, hydration=False, boilerplate_refs=boilerplate_refs
+                        )
+                        documents.append((final_url, page_html, document))
+            
+                for final_url, page_html, document in documents:
+                    pages.append(final_url)
+                    page_number = len(pages) + 1
+                    sections.extend(
+                        section.model_copy(update={"id": f"page{page_number}-{section.id}"})
+                        for section in document.sections
+                    )
+                    # Next-only pagination: continue from links found on the pages just fetched
+                    for next_url in find_pagination_urls(page_html, final_url):
+                        if next_url not in seen:
+                            seen.add(next_url)
+                            queue.append(next_url)
+        except DeadlineExceeded as e:
+            # Keep the pages that finished in time
+            print(f"Pagination stopped: {e}")
+        
+        return pages, sections
+    
+    def _parse_page(
+        self,
+        html: str,
+        page_url: str,
+        deadline: Deadline,
+        check_static: bool = False,
+        hydration: bool = True,
+        boilerplate_refs: Optional[Dict[str, Section]] = None
+    ):
+        """
+        Parse within the memory budget and mark the site's boilerplate
+        sections. When `boilerplate_refs` is given, known boilerplate is not
+        extracted but emitted as references, and their canonical sections are
+        added to `boilerplate_refs`.
+        """
+        known = self.boilerplate.known(page_url) if boilerplate_refs is not None else {}
+        document = self.parser_pool.parse(
+            html,
+            page_url,
+            check_static=check_static,
+            hydration=hydration,
+            max_nodes=self.budget.max_nodes,
+            boilerplate={fp: section.label for fp, section in known.items()},
+            timeout=max(deadline.remaining(), self.PARSE_GRACE_SECONDS)
+        )
+        if document.sufficient:
+            document.sections = self.boilerplate.observe(page_url, document.sections, document.fingerprints)
+        for section in document.sections:
+            if is_reference(section) and section.boilerplateRef in known:
+                boilerplate_refs[section.boilerplateRef] = known[section.boilerplateRef]
+        return document
+    
+    @staticmethod
+    def _referenced(sections: List[Section], boilerplate_refs: Dict[str, Section]) -> Dict[str, Section]:
+        """Canonical sections for the references among `sections`"""
+        return {
+            section.boilerplateRef: boilerplate_refs[section.boilerplateRef]
+            for section in sections
+            if is_reference(section) and section.boilerplateRef in boilerplate_refs
+        }
+    
+    def _fetch_static_page(self, url: str, deadline: Deadline) -> Optional[Tuple[str, str]]:
+        with StaticScraper() as static_scraper:
+            result = static_scraper.fetch(url, deadline=deadline)
+        if not result:
+            return None
+        page_html, final_url = result
+        page_html, _ = self.budget.clip_html(page_html)
+        return final_url, page_html
+    
+    def _check_node_budget(self, document, errors: List[Error]) -> bool:
+        if document.truncated:
+            errors.append(Error(
+                message=f"Parsing stopped after {self.budget.max_nodes} DOM nodes; some sections are missing.",
+                phase="parse"
+            ))
+        return document.truncated
+    
+    def _archive(self, url: str, final_url: str, html: str, kind: str, archive_ids: List[str]):
+        if not self.archive:
+            return
+        try:
+            archive_ids.append(self.archive.put(url, final_url, html, kind))
+        except Exception as e:
+            print(f"Archive error: {e}")
+    
     def _create_empty_result(self, url: str, errors: List[Error]) -> ScrapeResult:
         return ScrapeResult(
             url=url,
@@ -2,6 +2,8 @@ from selectolax.parser import HTMLParser, Node
 from urllib.parse import urljoin, urlparse
 from typing import List, Dict, Optional
 from backend.models import Section, Content, Link, Image
+from backend.scraper.hydration import extract_hydration_sections
+from backend.scraper.boilerplate import fingerprint
 
 
 class SectionParser:
@@ -20,6 +22,8 @@ class SectionParser:
         '[role="alertdialog"]',
     ]
     
+    LANDMARK_TAGS = ("header", "nav", "main", "section", "article", "footer")
+    
     SECTION_TYPE_MAP = {
         "header": "nav",
         "nav": "nav",
@@ -29,9 +33,23 @@ class SectionParser:
         "section": "section",
     }
     
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        include_hydration: bool = False,
+        max_nodes: Optional[int] = None,
+        boilerplate: Optional[Dict[str, str]] = None
+    ):
         self.base_url = base_url
         self.section_counter = 0
+        self.include_hydration = include_hydration
+        self.max_nodes = max_nodes
+        # Known boilerplate fingerprint -> label; matching elements are not extracted
+        self.boilerplate = boilerplate or {}
+        # Section id -> fingerprint, for feeding the boilerplate index
+        self.fingerprints: Dict[str, str] = {}
+        self.nodes_visited = 0
+        self.truncated = False
     
     def parse(self, html: str) -> List[Section]:
         """
@@ -40,6 +58,14 @@ class SectionParser:
         """
         tree = HTMLParser(html)
         
+        # Embedded framework state and JSON-LD (static pages only; rendered DOMs already show it)
+        hydration_sections = []
+        if self.include_hydration:
+            try:
+                hydration_sections = extract_hydration_sections(tree, self.base_url)
+            except Exception:
+                hydration_sections = []
+        
         # Remove noise elements
         self._remove_noise(tree)
         
@@ -47,12 +73,14 @@ class SectionParser:
         sections = []
         
         # First, try to extract by semantic landmarks
-        landmarks = tree.css("header, nav, main, section, article, footer")
+        landmarks = tree.css(", ".join(self.LANDMARK_TAGS))
         if landmarks:
             for landmark in landmarks:
+                if self._over_node_budget():
+                    break
                 try:
                     section = self._extract_section(landmark)
-                    if section and (section.content.text.strip() or section.content.headings):
+                    if section and (section.boilerplateRef or section.content.text.strip() or section.content.headings):
                         sections.append(section)
                 except Exception as e:
                     # Skip sections that fail to extract
@@ -65,6 +93,8 @@ class SectionParser:
             except Exception:
                 sections = []
         
+        sections.extend(hydration_sections)
+        
         # Ensure at least one section - try body, then html, then create minimal section
         if not sections:
             body = tree.css_first("body")
@@ -155,6 +185,31 @@ class SectionParser:
         
         return sections
     
+    def _over_node_budget(self) -> bool:
+        if self.max_nodes is not None and self.nodes_visited > self.max_nodes:
+            self.truncated = True
+            return True
+        return False
+    
+    def _walk(self, element: Node):
+        """
+        Element nodes of `element`'s subtree in document order, each with a
+        flag telling whether it lies inside a nested landmark. (selectolax's
+        traverse() continues past the element to the end of the document.)
+        """
+        stack = [(element, False)]
+        while stack:
+            node, nested = stack.pop()
+            yield node, nested
+            children = []
+            child = node.child
+            while child is not None:
+                tag = child.tag or ""
+                if tag[:1].isalpha():
+                    children.append((child, nested or tag in self.LANDMARK_TAGS))
+                child = child.next
+            stack.extend(reversed(children))
+    
     def _remove_noise(self, tree: HTMLParser):
         """Remove noise elements like cookie banners, popups, etc."""
         for selector in self.NOISE_SELECTORS:
@@ -189,13 +244,6 @@ class SectionParser:
         elif "list" in classes or "list" in section_id:
             section_type = "list"
         
-        # Extract content
-        content_dict = self._extract_content(element)
-        content = Content(**content_dict)
-        
-        # Generate label
-        label = default_label or self._generate_label(element, content_dict)
-        
         # Generate ID
         section_id_val = element.attributes.get("id")
         if not section_id_val:
@@ -206,10 +254,33 @@ class SectionParser:
         
         # Get raw HTML (truncated)
         raw_html = element.html
+        element_fingerprint = fingerprint(raw_html)
+        self.fingerprints[section_id_val] = element_fingerprint
+        
+        # Known boilerplate: emit a reference and skip content extraction
+        if element_fingerprint in self.boilerplate:
+            return Section(
+                id=section_id_val,
+                type=section_type,
+                label=default_label or self.boilerplate[element_fingerprint] or tag_name.capitalize(),
+                sourceUrl=self.base_url,
+                content=Content(),
+                rawHtml="",
+                truncated=False,
+                boilerplateRef=element_fingerprint
+            )
+        
         truncated = len(raw_html) > 5000
         if truncated:
             raw_html = raw_html[:5000] + "..."
         
+        # Extract content
+        content_dict = self._extract_content(element)
+        content = Content(**content_dict)
+        
+        # Generate label
+        label = default_label or self._generate_label(element, content_dict)
+        
         return Section(
             id=section_id_val,
             type=section_type,
@@ -237,7 +308,13 @@ class SectionParser:
         
         # Extract text (excluding script and style)
         text_parts = []
-        for node in element.traverse():
+        for node, nested in self._walk(element):
+            # Nested landmarks are extracted (and counted) on their own, so
+            # each DOM node counts once towards the budget
+            if not nested:
+                self.nodes_visited += 1
+            if self._over_node_budget():
+                break
             if node.tag in ("script", "style", "noscript"):
                 continue
             if node.tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from backend.models import Section, SectionDiff
+from backend.scraper.boilerplate import is_reference
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a fetched or rendered document body"""
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+def section_hash(section: Section, boilerplate: Optional[Dict[str, Section]] = None) -> str:
+    """
+    Hash of what a section says, ignoring its position-derived id and source
+    URL. Boilerplate references hash as their canonical section's content, so
+    a reference and a full extraction of the same markup compare equal.
+    """
+    content = section.content
+    if boilerplate and is_reference(section) and section.boilerplateRef in boilerplate:
+        content = boilerplate[section.boilerplateRef].content
+    payload = json.dumps(
+        {
+            "type": section.type,
+            "label": section.label,
+            "content": content.model_dump(),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Snapshot:
+    def __init__(
+        self,
+        url: str,
+        strategy: str,
+        meta: Dict,
+        sections: List[Section],
+        static_hash: Optional[str] = None,
+        rendered_hash: Optional[str] = None,
+        boilerplate: Optional[Dict[str, Section]] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.strategy = strategy
+        self.meta = meta
+        self.sections = sections
+        self.static_hash = static_hash
+        self.rendered_hash = rendered_hash
+        # Canonical sections for the boilerplate references in `sections`
+        self.boilerplate = boilerplate or {}
+        # Parallel to `sections`; ids are not guaranteed unique
+        self.section_hashes: List[str] = [section_hash(s, self.boilerplate) for s in sections]
+
+
+class SnapshotIndex:
+    """
+    In-memory LRU of recent scrape snapshots. Each snapshot keeps the hash of
+    the fetched body, the rendered body (JS path) and every section, so a
+    re-scrape can skip parsing when the body is unchanged and callers can ask
+    for a section-level diff against an earlier snapshot.
+    """
+
+    def __init__(self, max_snapshots: int = 256):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, Snapshot]" = OrderedDict()
+        self._latest: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record(self, snapshot: Snapshot, *urls: str) -> Snapshot:
+        with self._lock:
+            self._snapshots[snapshot.id] = snapshot
+            for url in (snapshot.url,) + urls:
+                self._latest[url] = snapshot.id
+            while len(self._snapshots) > self.max_snapshots:
+                old_id, old = self._snapshots.popitem(last=False)
+                for url, snap_id in list(self._latest.items()):
+                    if snap_id == old_id:
+                        del self._latest[url]
+        return snapshot
+
+    def get(self, snapshot_id: str) -> Optional[Snapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(snapshot_id)
+            if snapshot:
+                self._snapshots.move_to_end(snapshot_id)
+            return snapshot
+
+    def latest(self, url: str) -> Optional[Snapshot]:
+        with self._lock:
+            snapshot_id = self._latest.get(url)
+        return self.get(snapshot_id) if snapshot_id else None
+
+    @staticmethod
+    def diff(previous: Snapshot, current: Snapshot) -> Tuple[SectionDiff, List[Section]]:
+        """
+        Compare two snapshots. Section ids are position-derived, so sections
+        are first matched by content hash (each previous section matches at
+        most once) and matched ones are unchanged. Unmatched current sections
+        whose id is also an unmatched previous id are "changed", the other
+        unmatched current sections are "added", and previous sections left
+        unmatched are "removed". Returns the diff and the added + changed
+        sections.
+        """
+        # hash -> previous section ids with that content, in document order
+        unmatched_by_hash: Dict[str, List[str]] = {}
+        unmatched_previous: "OrderedDict[str, int]" = OrderedDict()
+        for section, digest in zip(previous.sections, previous.section_hashes):
+            unmatched_by_hash.setdefault(digest, []).append(section.id)
+            unmatched_previous[section.id] = unmatched_previous.get(section.id, 0) + 1
+
+        unmatched_current: List[Section] = []
+        for section, digest in zip(current.sections, current.section_hashes):
+            candidates = unmatched_by_hash.get(digest)
+            if candidates:
+                SnapshotIndex._consume(unmatched_previous, candidates.pop(0))
+            else:
+                unmatched_current.append(section)
+
+        diff = SectionDiff()
+        for section in unmatched_current:
+            if unmatched_previous.get(section.id):
+                SnapshotIndex._consume(unmatched_previous, section.id)
+                diff.changed.append(section.id)
+            else:
+                diff.added.append(section.id)
+        diff.removed = list(unmatched_previous)
+        return diff, unmatched_current
+
+    @staticmethod
+    def _consume(counts: "OrderedDict[str, int]", section_id: str):
+        counts[section_id] -= 1
+        if not counts[section_id]:
+            del counts[section_id]
+
+
+snapshot_index = SnapshotIndex()
@@ -1,34 +1,73 @@
+import threading
 import httpx
 from selectolax.parser import HTMLParser
 from urllib.parse import urljoin, urlparse
 from typing import Optional, Dict
 
+from backend.scraper.host_scheduler import HostScheduler, host_scheduler
+from backend.scraper.hydration import payload_kind, has_hydration_content
+from backend.scraper.deadline import Deadline
+
+FRAMEWORK_MARKERS = ("react", "vue", "angular")
+
+_shared_client: Optional[httpx.Client] = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_client() -> httpx.Client:
+    """Process-wide HTTP client so connections and TLS sessions are reused across scrapes"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = httpx.Client(
+                timeout=30,
+                follow_redirects=True,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+                }
+            )
+        return _shared_client
+
+
+def shared_client_ready() -> bool:
+    return _shared_client is not None
+
 
 class StaticScraper:
-    def __init__(self, timeout: int = 30):
+    def __init__(
+        self,
+        timeout: int = 30,
+        scheduler: Optional[HostScheduler] = None,
+        client: Optional[httpx.Client] = None
+    ):
         self.timeout = timeout
-        self.client = httpx.Client(
-            timeout=timeout,
-            follow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
-        )
+        self.scheduler = scheduler or host_scheduler
+        self.client = client or shared_client()
     
-    def fetch(self, url: str) -> Optional[tuple[str, str]]:
+    def fetch(self, url: str, deadline: Optional[Deadline] = None) -> Optional[tuple[str, str]]:
         try:
             parsed = urlparse(url)
             if parsed.scheme not in ("http", "https"):
                 return None
             
-            response = self.client.get(url)
+            timeout = deadline.timeout(self.timeout) if deadline else self.timeout
+            if timeout <= 0:
+                return None
+            with self.scheduler.slot(url, timeout=timeout) as outcome:
+                # httpx applies this per connect/read, so the deadline is re-read after queueing
+                timeout = deadline.timeout(self.timeout) if deadline else self.timeout
+                response = self.client.get(url, timeout=max(timeout, 0.001))
+                outcome["status"] = response.status_code
+                outcome["retry_after"] = response.headers.get("retry-after")
+            # Outside the slot: a 404 is not congestion, only 429/503 and transport errors are
             response.raise_for_status()
             return (response.text, str(response.url))
         except Exception as e:
             print(f"Static fetch error: {e}")
             return None
     
-    def extract_meta(self, html: str, base_url: str) -> Dict:
+    @staticmethod
+    def extract_meta(html: str, base_url: str) -> Dict:
         tree = HTMLParser(html)
         meta = {
             "title": "",
@@ -68,34 +107,36 @@ class StaticScraper:
         
         return meta
     
-    def is_static_sufficient(self, html: str) -> bool:
+    @staticmethod
+    def is_static_sufficient(html: str) -> bool:
         tree = HTMLParser(html)
         
-        scripts = tree.css("script")
-        has_react = any("react" in script.text().lower() or "react" in script.attributes.get("src", "").lower() 
-                       for script in scripts if script.text() or script.attributes.get("src"))
-        has_vue = any("vue" in script.text().lower() or "vue" in script.attributes.get("src", "").lower() 
-                     for script in scripts if script.text() or script.attributes.get("src"))
-        has_angular = any("angular" in script.text().lower() or "angular" in script.attributes.get("src", "").lower() 
-                         for script in scripts if script.text() or script.attributes.get("src"))
-        
-        main_content = tree.css_first("main, article, [role='main']")
-        has_main = main_content is not None
+        # Single pass over scripts: framework markers and embedded hydration payloads
+        has_framework = False
+        has_payload = False
+        for script in tree.css("script"):
+            text = script.text() or ""
+            src = script.attributes.get("src") or ""
+            if not has_framework and (text or src):
+                haystack = f"{src} {text}".lower()
+                has_framework = any(marker in haystack for marker in FRAMEWORK_MARKERS)
+            if not has_payload:
+                has_payload = payload_kind(script, text) is not None
+            if has_framework and has_payload:
+                break
         
         body = tree.css_first("body")
         text_length = len(body.text()) if body else 0
         
-        if (has_react or has_vue or has_angular) and text_length < 500:
-            return False
-        
-        if text_length > 1000:
-            return True
+        if has_framework and text_length < 500:
+            # SPA shells that ship their content as JSON can be parsed statically
+            return has_payload and has_hydration_content(tree)
         
         return True
     
     def close(self):
-        """Close the HTTP client"""
-        self.client.close()
+        """The HTTP client is shared and outlives the scraper"""
+        pass
     
     def __enter__(self):
         return self
@@ -0,0 +1,71 @@
+import os
+import sys
+import threading
+from typing import Dict
+
+# Static-only deployments can skip the browser and still report ready
+BROWSER_REQUIRED = os.environ.get("SCRAPER_WARM_BROWSER", "1") != "0"
+
+_state = {
+    "started": False,
+    "finished": False,
+    "httpClient": False,
+    "browserPool": False,
+}
+_lock = threading.Lock()
+
+
+def warm_up():
+    """
+    Import the scraping stack, open the shared HTTP client and launch the
+    render lane's browsers. Meant to run once in an executor thread at startup.
+    """
+    with _lock:
+        if _state["started"]:
+            return
+        _state["started"] = True
+
+    try:
+        from backend.scraper.static_scraper import shared_client
+        import backend.scraper.scraper_service  # noqa: F401  (httpx, selectolax, parse pool)
+
+        shared_client()
+        with _lock:
+            _state["httpClient"] = True
+    except Exception as e:
+        print(f"HTTP client warm-up failed: {e}")
+
+    if BROWSER_REQUIRED:
+        from backend.scraper.admission import admission
+        from backend.scraper.browser_pool import browser_pool
+
+        # Browsers are thread-local, so launch them on the render lane's threads
+        futures = [admission.render.executor.submit(browser_pool.warm) for _ in range(admission.render.capacity)]
+        warm = any([future.result() for future in futures])
+        with _lock:
+            _state["browserPool"] = warm
+
+    with _lock:
+        _state["finished"] = True
+
+
+def readiness() -> Dict:
+    with _lock:
+        state = dict(_state)
+
+    # Only inspect modules that are already loaded; readiness must not trigger imports
+    static_module = sys.modules.get("backend.scraper.static_scraper")
+    http_ready = state["httpClient"] or bool(static_module and static_module.shared_client_ready())
+
+    browser = {"required": BROWSER_REQUIRED, "ready": state["browserPool"]}
+    pool_module = sys.modules.get("backend.scraper.browser_pool")
+    if pool_module:
+        browser.update(pool_module.browser_pool.status())
+        browser["ready"] = browser["ready"] or browser["warm"] > 0
+
+    return {
+        "ready": http_ready and (browser["ready"] or not BROWSER_REQUIRED),
+        "warmUpFinished": state["finished"],
+        "httpClient": {"ready": http_ready},
+        "browserPool": browser,
+    }
@@ -0,0 +1,54 @@
+"""
+Startup-time budget check.
+
+Imports the app in a fresh interpreter and fails if it takes longer than the
+budget or if heavy scraping modules were loaded at import time.
+
+    python -m backend.startup_check --budget 2.0
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+LAZY_MODULES = ("playwright", "httpx", "selectolax", "zstandard")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.startup_check")
+    parser.add_argument("--budget", type=float, default=2.0, help="Maximum seconds to import backend.main")
+    args = parser.parse_args(argv)
+
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % (LAZY_MODULES,)],
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    probe = json.loads(output.strip().splitlines()[-1])
+
+    failures = []
+    if probe["seconds"] > args.budget:
+        failures.append(f"import took {probe['seconds']:.2f}s (budget {args.budget:.2f}s)")
+    if probe["loaded"]:
+        failures.append(f"heavy modules loaded at startup: {', '.join(probe['loaded'])}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print(f"OK: backend.main imported in {probe['seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())